@@ -4,13 +4,36 @@ import jealous_husbands_dfs
 import missionary_cannibal_a_star
 import missionary_cannibal_solver_bfs
 import missionary_cannibal_solver_dfs
+import feasibility
+import instances
+import plan_verification
+import planning_sessions
+from single_flight import SingleFlight
+import solver_portfolio
+import state_graph
+from response_encoding import etag_matches, instance_etag, json_response, not_modified
 
 from flask import Flask, request
 from flask_cors import CORS, cross_origin
 import json
+import os
+
+# Solvers whose response depends only on the instance, so it can carry a strong ETag
+DETERMINISTIC_SOLVERS = {"bfs", "dfs", "a_star"}
+
+# Directory of graphs compiled with state_graph.py; solvers run on them when available
+STATE_GRAPH_DIR = os.environ.get("STATE_GRAPH_DIR")
+
+# Identical deterministic requests in flight at the same time share one solve,
+# also across worker processes on this host
+coalescer = SingleFlight(os.environ.get("SINGLE_FLIGHT_DIR"), timeout=float(os.environ.get("SINGLE_FLIGHT_TIMEOUT", 30)))
+
+# JSON-lines log of portfolio races; the portfolio learns per-class defaults from it
+PORTFOLIO_LOG = os.environ.get("PORTFOLIO_LOG")
+PORTFOLIO_TIMEOUT = float(os.environ.get("PORTFOLIO_TIMEOUT", 30))
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["ETag"])
 
 @app.route("/")
 def test():
@@ -31,12 +54,48 @@ def missionary_cannibal():
     boat_position = parameters["boat_position"]
     boat_capacity = parameters["boat_capacity"]
     solver = parameters["solver"]
-    if solver == "bfs":
-        return json.dumps(missionary_cannibal_solver_bfs.solve_missionaries_cannibals(M_total, C_total, boat_capacity, M_left, C_left, M_right, C_right, boat_position))
-    if solver == "dfs":
-        return json.dumps(missionary_cannibal_solver_dfs.solve_missionaries_cannibals(M_total, C_total, boat_capacity, M_left, C_left, M_right, C_right, boat_position))
-    if solver == "a_star":
-        return json.dumps(missionary_cannibal_a_star.solve_missionaries_cannibals(M_total, C_total, boat_capacity, M_left, C_left, M_right, C_right, boat_position))
+    memory_lean = parameters.get("memory_lean", False)
+    visited_memory = parameters.get("visited_memory")
+    false_positive_rate = parameters.get("false_positive_rate", 0.01)
+    guarantee = parameters.get("guarantee", "any")
+    instance = instances.missionary_cannibal_key(M_total, C_total, boat_capacity, M_left, C_left, M_right, C_right, boat_position)
+    variant = (solver, memory_lean, visited_memory, false_positive_rate)
+    etag = instance_etag(instance, variant) if solver in DETERMINISTIC_SOLVERS else None
+    if etag_matches(etag):
+        return not_modified(etag)
+
+    def solve():
+        check = feasibility.missionary_cannibal_feasibility(M_total, C_total, boat_capacity, M_left, C_left, M_right, C_right, boat_position)
+        if not check["solvable"]:
+            return {"output": None, "number_of_states": 0, "N": M_total, "reason": check["reason"]}
+        # The compiled graph gives the same answers as the solvers, only faster
+        graph = None
+        if solver in DETERMINISTIC_SOLVERS and not memory_lean and visited_memory is None:
+            graph = state_graph.find_state_graph(STATE_GRAPH_DIR, "missionary-cannibal", (M_total, C_total), boat_capacity)
+            if graph is not None and graph.index_of((M_left, C_left, M_right, C_right, boat_position)) is None:
+                graph = None
+        if solver == "portfolio":
+            result = solver_portfolio.race("missionary-cannibal", dict(M_total=M_total, C_total=C_total, boat_capacity=boat_capacity, M_left=M_left, C_left=C_left, M_right=M_right, C_right=C_right, boat_position=boat_position), guarantee, PORTFOLIO_LOG, PORTFOLIO_TIMEOUT)
+        elif graph is not None:
+            result = state_graph.solve_missionaries_cannibals(graph, M_left, C_left, M_right, C_right, boat_position, solver)
+        elif solver == "bfs":
+            result = missionary_cannibal_solver_bfs.solve_missionaries_cannibals(M_total, C_total, boat_capacity, M_left, C_left, M_right, C_right, boat_position, memory_lean=memory_lean)
+        elif solver == "dfs":
+            result = missionary_cannibal_solver_dfs.solve_missionaries_cannibals(M_total, C_total, boat_capacity, M_left, C_left, M_right, C_right, boat_position, visited_memory=visited_memory, false_positive_rate=false_positive_rate)
+        else:
+            result = missionary_cannibal_a_star.solve_missionaries_cannibals(M_total, C_total, boat_capacity, M_left, C_left, M_right, C_right, boat_position)
+        if (solver == "bfs" or solver == "portfolio" and guarantee == "optimal") and result["output"] is not None:
+            plan_verification.record_optimal_length(instance, len(result["output"]) - 1)
+        return result
+
+    if solver == "portfolio":
+        if guarantee not in solver_portfolio.GUARANTEES:
+            return json_response({"error": "unknown guarantee: %s" % guarantee}), 400
+        return json_response(solve())
+    if solver not in DETERMINISTIC_SOLVERS:
+        return json_response({"error": "unknown solver: %s" % solver}), 400
+    result, _ = coalescer.do((instance, variant), solve)
+    return json_response(result, etag)
     
 
 @app.route("/jealous-husband", methods = ['POST'])
@@ -51,14 +110,109 @@ def jealous_husband():
     left_bank = stage["left_bank"]
     right_bank = stage["right_bank"]
     boat_position = stage["boat_position"]
-    if solver == "bfs":
-        return json.dumps(jealous_husbands_bfs.solve_jealous_husbands(N=num_of_couples, boat_capacity=boat_capacity, left=left_bank, right=right_bank, boat_pos=boat_position))
-    if solver == "dfs":
-        print(jealous_husbands_dfs.solve_jealous_husbands(N=num_of_couples, boat_capacity=boat_capacity, left=left_bank, right=right_bank, boat_pos=boat_position))
-        return json.dumps(jealous_husbands_dfs.solve_jealous_husbands(N=num_of_couples, boat_capacity=boat_capacity, left=left_bank, right=right_bank, boat_pos=boat_position))
-    if solver == "a_star":
-        return json.dumps(jealous_husbands_a_star.solve_jealous_husbands(N=num_of_couples, boat_capacity=boat_capacity, left=left_bank, right=right_bank, boat_pos=boat_position))
+    memory_lean = parameters.get("memory_lean", False)
+    vectorized = parameters.get("vectorized", False)
+    visited_memory = parameters.get("visited_memory")
+    false_positive_rate = parameters.get("false_positive_rate", 0.01)
+    guarantee = parameters.get("guarantee", "any")
+    instance = instances.jealous_husband_key(num_of_couples, boat_capacity, left_bank, right_bank, boat_position)
+    variant = (solver, memory_lean, vectorized, visited_memory, false_positive_rate)
+    etag = instance_etag(instance, variant) if solver in DETERMINISTIC_SOLVERS else None
+    if etag_matches(etag):
+        return not_modified(etag)
+
+    def solve():
+        check = feasibility.jealous_husbands_feasibility(num_of_couples, boat_capacity, left_bank, right_bank, boat_position)
+        if not check["solvable"]:
+            return {"output": None, "number_of_states": 0, "N": num_of_couples, "reason": check["reason"]}
+        # The compiled graph gives the same answers as the solvers, only faster
+        graph = None
+        if solver in DETERMINISTIC_SOLVERS and not memory_lean and not vectorized and visited_memory is None:
+            graph = state_graph.find_state_graph(STATE_GRAPH_DIR, "jealous-husband", num_of_couples, boat_capacity)
+            if graph is not None and graph.index_of(state_graph.jealous_husbands_state(left_bank, right_bank, boat_position)) is None:
+                graph = None
+        if solver == "portfolio":
+            result = solver_portfolio.race("jealous-husband", dict(N=num_of_couples, boat_capacity=boat_capacity, left=left_bank, right=right_bank, boat_pos=boat_position), guarantee, PORTFOLIO_LOG, PORTFOLIO_TIMEOUT)
+        elif graph is not None:
+            result = state_graph.solve_jealous_husbands(graph, left_bank, right_bank, boat_position, solver)
+        elif solver == "bfs":
+            result = jealous_husbands_bfs.solve_jealous_husbands(N=num_of_couples, boat_capacity=boat_capacity, left=left_bank, right=right_bank, boat_pos=boat_position, memory_lean=memory_lean, vectorized=vectorized)
+        elif solver == "dfs":
+            result = jealous_husbands_dfs.solve_jealous_husbands(N=num_of_couples, boat_capacity=boat_capacity, left=left_bank, right=right_bank, boat_pos=boat_position, visited_memory=visited_memory, false_positive_rate=false_positive_rate)
+        elif solver == "a_star":
+            result = jealous_husbands_a_star.solve_jealous_husbands(N=num_of_couples, boat_capacity=boat_capacity, left=left_bank, right=right_bank, boat_pos=boat_position)
+        else:
+            time_budget = parameters.get("time_budget", 1.0)
+            result = jealous_husbands_a_star.solve_jealous_husbands_anytime(N=num_of_couples, boat_capacity=boat_capacity, left=left_bank, right=right_bank, boat_pos=boat_position, time_budget=time_budget)
+        if (solver == "bfs" or solver == "portfolio" and guarantee == "optimal") and result["output"] is not None:
+            plan_verification.record_optimal_length(instance, len(result["output"]) - 1)
+        return result
+
+    if solver == "anytime_a_star":
+        return json_response(solve())
+    if solver == "portfolio":
+        if guarantee not in solver_portfolio.GUARANTEES:
+            return json_response({"error": "unknown guarantee: %s" % guarantee}), 400
+        return json_response(solve())
+    if solver not in DETERMINISTIC_SOLVERS:
+        return json_response({"error": "unknown solver: %s" % solver}), 400
+    result, _ = coalescer.do((instance, variant), solve)
+    return json_response(result, etag)
  
 
+@app.route("/verify", methods = ['POST'])
+@cross_origin()
+def verify():
+    parameters = json.loads(request.data)
+    puzzle = parameters["puzzle"]
+    boat_capacity = parameters["boat_capacity"]
+    plan = parameters["plan"]
+    if puzzle == "missionary-cannibal":
+        return json_response(plan_verification.verify_missionary_cannibal_plan(parameters["M_total"], parameters["C_total"], boat_capacity, plan))
+    if puzzle == "jealous-husband":
+        return json_response(plan_verification.verify_jealous_husbands_plan(parameters["num_of_couples"], boat_capacity, plan))
+    return json_response({"error": "unknown puzzle: %s" % puzzle}), 400
+
+
+@app.route("/session", methods = ['POST'])
+@cross_origin()
+def start_session():
+    parameters = json.loads(request.data)
+    puzzle = parameters["puzzle"]
+    boat_capacity = parameters["boat_capacity"]
+    if puzzle == "missionary-cannibal":
+        distances = planning_sessions.missionary_cannibal_distances(parameters["M_total"], parameters["C_total"], boat_capacity)
+    elif puzzle == "jealous-husband":
+        distances = planning_sessions.jealous_husbands_distances(parameters["num_of_couples"], boat_capacity)
+    else:
+        return json_response({"error": "unknown puzzle: %s" % puzzle}), 400
+    session_id, session = planning_sessions.create_session(distances)
+    result = planning_sessions.move(session, parameters, parameters.get("full_plan", True))
+    result["session_id"] = session_id
+    return json_response(result)
+
+
+@app.route("/session/<session_id>", methods = ['POST'])
+@cross_origin()
+def session_move(session_id):
+    session = planning_sessions.get_session(session_id)
+    if session is None:
+        return json_response({"error": "unknown session: %s" % session_id}), 404
+    parameters = json.loads(request.data)
+    return json_response(planning_sessions.move(session, parameters, parameters.get("full_plan", False)))
+
+
+@app.route("/stats/portfolio")
+def portfolio_stats():
+    if not PORTFOLIO_LOG:
+        return json_response({})
+    return json_response(solver_portfolio.win_statistics(PORTFOLIO_LOG))
+
+
+@app.route("/stats/coalescing")
+def coalescing_stats():
+    return json_response(coalescer.stats())
+
+
 if __name__ == "__main__":
     app.run(debug=False)
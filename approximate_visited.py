@@ -0,0 +1,99 @@
+"""
+Approximate visited set for memory-capped depth-first exploration.
+
+A Bloom filter sized from a memory budget replaces the exact visited set.
+It never forgets a state it has seen. A state it has never seen is, with a
+small probability, reported as seen anyway, and the search then prunes it
+although it should not. A search using it can therefore miss a plan, but it
+never loops.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Bloom filter over memory_bytes bytes with the number of hash functions
+    chosen for false_positive_rate. It stays at or below that rate while it
+    holds up to `capacity` states.
+
+    key turns a state into bytes. It must be stable across processes, so
+    that a search explores the same states on every run.
+
+    Supports `state in filter` and `filter.add(state)`, like a set. Every
+    membership test that misses adds to an estimate of how many unseen states
+    were wrongly reported as seen. The estimate is close while no more than
+    `capacity` states have been added, and too low once the filter is
+    heavily overfilled.
+    """
+
+    def __init__(self, memory_bytes, false_positive_rate=0.01, key=None):
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+        self.num_bits = max(64, int(memory_bytes) * 8)
+        self.num_hashes = max(1, round(-math.log2(false_positive_rate)))
+        self.capacity = int(self.num_bits * math.log(2) ** 2 / -math.log(false_positive_rate))
+        self.key = key or (lambda state: repr(state).encode())
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.bits_set = 0
+        self.added = 0
+        self.negatives = 0
+        self.estimated_false_positives = 0.0
+
+    def _positions(self, state):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(self.key(state), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def false_positive_probability(self):
+        """
+        Chance that a state never added is reported as present, from the
+        current fraction of set bits.
+        """
+        return (self.bits_set / self.num_bits) ** self.num_hashes
+
+    def __contains__(self, state):
+        bits = self.bits
+        for position in self._positions(state):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                # Of the new states queried at this fill, a fraction fp were
+                # wrongly reported present for every 1 - fp that got through
+                self.negatives += 1
+                fp = self.false_positive_probability()
+                self.estimated_false_positives += fp / (1 - fp)
+                return False
+        return True
+
+    def add(self, state):
+        bits = self.bits
+        for position in self._positions(state):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                self.bits_set += 1
+        self.added += 1
+
+    def __len__(self):
+        return self.added
+
+    def stats(self):
+        return {
+            "memory_bytes": len(self.bits),
+            "hashes": self.num_hashes,
+            "capacity": self.capacity,
+            "added": self.added,
+            "fill_ratio": round(self.bits_set / self.num_bits, 6),
+            "false_positive_probability": round(self.false_positive_probability(), 6),
+            "estimated_false_prunes": round(self.estimated_false_positives, 3)
+        }
+
+def visited_set(visited_memory=None, false_positive_rate=0.01, key=None):
+    """
+    The visited structure for a DFS: an exact set when visited_memory is None,
+    otherwise a BloomFilter of visited_memory bytes.
+    """
+    if visited_memory is None:
+        return set()
+    return BloomFilter(visited_memory, false_positive_rate, key)
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+
+
+class BucketQueue:
+    """
+    Dial-style bucket priority queue for A* open lists.
+
+    Priorities are small non-negative integers (f = g + h bounded by the plan
+    length), so states are kept in buckets indexed by f and, inside a bucket,
+    by g. pop() returns a state with the lowest f, breaking ties towards the
+    higher g (deeper states) and then first-in first-out, which is fully
+    deterministic and never compares states.
+
+    An index from state to its (f, g) entry gives decrease-key: pushing a state
+    that is already queued moves it instead of adding a stale duplicate.
+    Buckets are OrderedDicts, which pop their oldest entry and delete any
+    entry in O(1), so push and pop take amortized constant time.
+    """
+
+    def __init__(self):
+        self._buckets = []   # f -> list indexed by g of OrderedDict {state: None}
+        self._top_g = []     # f -> highest g whose bucket may be non-empty
+        self._index = {}     # state -> (f, g)
+        self._min_f = 0
+
+    def __len__(self):
+        return len(self._index)
+
+    def __bool__(self):
+        return bool(self._index)
+
+    def __contains__(self, state):
+        return state in self._index
+
+    def push(self, state, f, g):
+        """
+        Queue state with priority (f, g), or lower the priority of a queued state.
+        Returns False if the state is already queued with an equal or better priority.
+        """
+        old = self._index.get(state)
+        if old is not None:
+            old_f, old_g = old
+            if (f, -g) >= (old_f, -old_g):
+                return False
+            del self._buckets[old_f][old_g][state]
+
+        while len(self._buckets) <= f:
+            self._buckets.append([])
+            self._top_g.append(-1)
+        by_g = self._buckets[f]
+        while len(by_g) <= g:
+            by_g.append(OrderedDict())
+        by_g[g][state] = None
+        if g > self._top_g[f]:
+            self._top_g[f] = g
+        self._index[state] = (f, g)
+        if f < self._min_f:
+            self._min_f = f
+        return True
+
+    def pop(self):
+        """
+        Remove and return (f, g, state) with the lowest f and, among those, the highest g.
+        """
+        if not self._index:
+            raise IndexError("pop from an empty BucketQueue")
+        f = self._min_f
+        while True:
+            by_g = self._buckets[f]
+            # Emptied g slots are skipped once, not on every pop
+            g = self._top_g[f]
+            while g >= 0 and not by_g[g]:
+                g -= 1
+            self._top_g[f] = g
+            if g >= 0:
+                state, _ = by_g[g].popitem(last=False)
+                del self._index[state]
+                self._min_f = f
+                return f, g, state
+            f += 1
@@ -0,0 +1,169 @@
+from collections import deque
+from functools import lru_cache
+
+import jealous_husbands_bfs
+import missionary_cannibal_solver_bfs
+
+# Largest number of couples (or of missionaries = cannibals) that can cross
+# from the standard start with a boat of the given capacity; from 4 seats on
+# every size is solvable.
+MAX_SOLVABLE_PAIRS = {1: 0, 2: 3, 3: 5}
+
+
+def _theorem(pairs, boat_capacity):
+    """
+    Known result for the standard start (everyone on the left, boat on the left).
+    """
+    if pairs == 0:
+        # Nobody can row the boat over to the goal bank
+        return False
+    if boat_capacity >= 4:
+        return True
+    if boat_capacity < 1:
+        return False
+    return pairs <= MAX_SOLVABLE_PAIRS[boat_capacity]
+
+def _result(solvable, reason):
+    return {"solvable": solvable, "reason": reason}
+
+def _mirror(abstract_state, N):
+    """
+    Swap banks: the right bank's full couples, lone husbands and lone wives.
+    """
+    a, b, c = abstract_state
+    return (N - a - b - c, c, b)
+
+def _valid_bank(a, b, c, N):
+    """
+    A bank with a full couples, b husbands without their wives and c wives
+    without their husbands is valid if no wife is alone with other men.
+    """
+    return c == 0 or a + b == 0
+
+def _abstract_moves(a, b, c, N, boat_capacity):
+    """
+    All left-bank abstract states reachable by one crossing from the left bank.
+    x couples cross together, y husbands and z wives leave their partner behind,
+    u lone husbands and v lone wives cross to rejoin their partner.
+    """
+    for x in range(0, min(a, boat_capacity // 2) + 1):
+        for y in range(0, min(a - x, boat_capacity - 2 * x) + 1):
+            for z in range(0, min(a - x - y, boat_capacity - 2 * x - y) + 1):
+                used = 2 * x + y + z
+                for u in range(0, min(b, boat_capacity - used) + 1):
+                    for v in range(0, min(c, boat_capacity - used - u) + 1):
+                        if used + u + v == 0:
+                            continue
+                        yield (a - x - y - z, b - u + z, c - v + y)
+
+@lru_cache(maxsize=64)
+def _jealous_husbands_goal_component(N, boat_capacity):
+    """
+    Abstract states (full couples, lone husbands, lone wives on the left, boat side)
+    from which the goal is reachable. Validity only depends on these counts, so
+    the abstraction is exact, and every move can be undone, so searching from the
+    goal finds exactly the states that can reach it.
+    """
+    goal = ((0, 0, 0), 'R')
+    component = {goal}
+    queue = deque([goal])
+    while queue:
+        left_counts, boat_pos = queue.popleft()
+        if boat_pos == 'L':
+            moves = _abstract_moves(*left_counts, N, boat_capacity)
+            new_pos = 'R'
+        else:
+            moves = (_mirror(m, N) for m in _abstract_moves(*_mirror(left_counts, N), N, boat_capacity))
+            new_pos = 'L'
+        for counts in moves:
+            nxt = (counts, new_pos)
+            if nxt in component:
+                continue
+            if _valid_bank(*counts, N) and _valid_bank(*_mirror(counts, N), N):
+                component.add(nxt)
+                queue.append(nxt)
+    return frozenset(component)
+
+def jealous_husbands_feasibility(N=3, boat_capacity=2, left=None, right=None, boat_pos='L'):
+    """
+    Decide whether a Jealous Husbands instance has a solution without searching it.
+
+    Returns {"solvable": bool, "reason": code} where code is one of
+    "already_at_goal", "malformed_start", "invalid_start", "theorem_solvable",
+    "theorem_unsolvable", "goal_reachable" or "goal_unreachable".
+    """
+    everyone = frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)])
+    left = everyone if left is None else frozenset(tuple(p) for p in left)
+    right = frozenset() if right is None else frozenset(tuple(p) for p in right)
+
+    if left & right or left | right != everyone or boat_pos not in ('L', 'R'):
+        return _result(False, "malformed_start")
+    if not left and boat_pos == 'R':
+        return _result(True, "already_at_goal")
+    if not jealous_husbands_bfs.is_valid_state(left, right):
+        return _result(False, "invalid_start")
+    if left == everyone and boat_pos == 'L':
+        solvable = _theorem(N, boat_capacity)
+        return _result(solvable, "theorem_solvable" if solvable else "theorem_unsolvable")
+
+    full = sum(1 for i in range(1, N+1) if ('H', i) in left and ('W', i) in left)
+    lone_husbands = sum(1 for i in range(1, N+1) if ('H', i) in left and ('W', i) not in left)
+    lone_wives = sum(1 for i in range(1, N+1) if ('W', i) in left and ('H', i) not in left)
+    abstract_start = ((full, lone_husbands, lone_wives), boat_pos)
+    if abstract_start in _jealous_husbands_goal_component(N, boat_capacity):
+        return _result(True, "goal_reachable")
+    return _result(False, "goal_unreachable")
+
+@lru_cache(maxsize=64)
+def _missionary_cannibal_goal_component(M_total, C_total, boat_capacity):
+    """
+    States from which the Missionaries and Cannibals goal is reachable
+    (none if the goal itself breaks the constraint).
+    """
+    goal = (0, 0, M_total, C_total, 'right')
+    if not missionary_cannibal_solver_bfs.is_valid_state(*goal[:4], M_total, C_total):
+        return frozenset()
+    component = {goal}
+    queue = deque([goal])
+    while queue:
+        state = queue.popleft()
+        for nxt in missionary_cannibal_solver_bfs.get_next_states(state, M_total, C_total, boat_capacity):
+            if nxt not in component:
+                component.add(nxt)
+                queue.append(nxt)
+    return frozenset(component)
+
+def missionary_cannibal_feasibility(M_total=3, C_total=3, boat_capacity=2,
+                                    M_left=None, C_left=None, M_right=None, C_right=None, boat_position='left'):
+    """
+    Decide whether a Missionaries and Cannibals instance has a solution without searching it.
+
+    Returns {"solvable": bool, "reason": code} with the same codes as
+    jealous_husbands_feasibility, plus "invalid_goal" when more cannibals than
+    missionaries would end up on the right bank.
+    """
+    if M_left is None:
+        M_left = M_total
+    if C_left is None:
+        C_left = C_total
+    if M_right is None:
+        M_right = 0
+    if C_right is None:
+        C_right = 0
+
+    if M_left + M_right != M_total or C_left + C_right != C_total or boat_position not in ('left', 'right'):
+        return _result(False, "malformed_start")
+    start_state = (M_left, C_left, M_right, C_right, boat_position)
+    if not missionary_cannibal_solver_bfs.is_valid_state(0, 0, M_total, C_total, M_total, C_total):
+        return _result(False, "invalid_goal")
+    if start_state == (0, 0, M_total, C_total, 'right'):
+        return _result(True, "already_at_goal")
+    if not missionary_cannibal_solver_bfs.is_valid_state(M_left, C_left, M_right, C_right, M_total, C_total):
+        return _result(False, "invalid_start")
+    if M_total == C_total and M_left == M_total and C_left == C_total and boat_position == 'left':
+        solvable = _theorem(M_total, boat_capacity)
+        return _result(solvable, "theorem_solvable" if solvable else "theorem_unsolvable")
+
+    if start_state in _missionary_cannibal_goal_component(M_total, C_total, boat_capacity):
+        return _result(True, "goal_reachable")
+    return _result(False, "goal_unreachable")
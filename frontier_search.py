@@ -0,0 +1,85 @@
+def _meet_in_the_middle(start, goal, successors, counter):
+    """
+    Bidirectional BFS that only keeps the current and previous layer of each
+    direction. Moves between valid states are reversible in both puzzles, so
+    successors() also gives predecessors, and a new layer only has to be
+    checked against the two layers before it.
+
+    Returns (forward_depth, backward_depth, middle) where middle lies on a
+    shortest path, forward_depth moves from start and backward_depth moves
+    before goal, or None if goal is unreachable. counter[0] is incremented by
+    the number of states expanded.
+    """
+    if start == goal:
+        return 0, 0, start
+
+    forward_previous, forward = set(), {start}
+    backward_previous, backward = set(), {goal}
+    forward_depth = backward_depth = 0
+
+    while forward and backward:
+        # Alternate directions, forward first, so the middle is never the start
+        if forward_depth <= backward_depth:
+            frontier, previous = forward, forward_previous
+        else:
+            frontier, previous = backward, backward_previous
+        next_layer = set()
+        for state in frontier:
+            counter[0] += 1
+            for nxt in successors(state):
+                if nxt not in previous and nxt not in frontier:
+                    next_layer.add(nxt)
+        if forward_depth <= backward_depth:
+            forward_previous, forward = forward, next_layer
+            forward_depth += 1
+        else:
+            backward_previous, backward = backward, next_layer
+            backward_depth += 1
+
+        small, large = (forward, backward) if len(forward) <= len(backward) else (backward, forward)
+        meeting = [state for state in small if state in large]
+        if meeting:
+            # repr() keeps the choice independent of set iteration order
+            return forward_depth, backward_depth, min(meeting, key=repr)
+    return None
+
+def _recover_path(start, goal, successors, counter, expected=None):
+    """
+    A shortest path from start to goal, or None. Moves into an invalid state
+    are not reversible, so a backward search from an invalid goal can report
+    a meeting that no forward path matches. Each half must then have exactly
+    the length the meeting promised, which rejects such results and keeps
+    the recursion shrinking.
+    """
+    found = _meet_in_the_middle(start, goal, successors, counter)
+    if found is None:
+        return None
+    forward_depth, backward_depth, middle = found
+    distance = forward_depth + backward_depth
+    if expected is not None and distance != expected:
+        return None
+    if distance <= 1:
+        return [start] if distance == 0 else [start, goal]
+    first_half = _recover_path(start, middle, successors, counter, forward_depth)
+    if first_half is None:
+        return None
+    second_half = _recover_path(middle, goal, successors, counter, backward_depth)
+    if second_half is None:
+        return None
+    return first_half + second_half[1:]
+
+def divide_and_conquer_bfs(start, goal, successors):
+    """
+    Memory-lean shortest path search that keeps no parent map.
+
+    A frontier-only bidirectional BFS finds the optimal length and a state in
+    the middle of an optimal path; both halves are then recovered recursively
+    the same way. Peak memory is proportional to the widest BFS layer instead
+    of the number of states, at the cost of re-expanding states in the
+    O(log length) levels of recursion.
+
+    Returns (path, number_of_states_expanded); path is None if goal is unreachable.
+    """
+    counter = [0]
+    path = _recover_path(start, goal, successors, counter)
+    return path, counter[0]
@@ -0,0 +1,28 @@
+def jealous_husband_key(N, boat_capacity, left=None, right=None, boat_pos='L'):
+    """
+    Normalized, hashable description of a Jealous Husbands instance.
+    Two requests describing the same start state map to the same key, however
+    the people are ordered in the banks.
+    """
+    everyone = [('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)]
+    if left is None:
+        left = everyone
+    if right is None:
+        right = []
+    left = tuple(sorted(tuple(p) for p in left))
+    right = tuple(sorted(tuple(p) for p in right))
+    return ("jealous-husband", N, boat_capacity, left, right, boat_pos)
+
+def missionary_cannibal_key(M_total, C_total, boat_capacity, M_left=None, C_left=None, M_right=None, C_right=None, boat_position='left'):
+    """
+    Normalized, hashable description of a Missionaries and Cannibals instance.
+    """
+    if M_left is None:
+        M_left = M_total
+    if C_left is None:
+        C_left = C_total
+    if M_right is None:
+        M_right = 0
+    if C_right is None:
+        C_right = 0
+    return ("missionary-cannibal", M_total, C_total, boat_capacity, M_left, C_left, M_right, C_right, boat_position)
@@ -1,6 +1,10 @@
 import math
 import heapq
 import itertools
+import time
+
+from bucket_queue import BucketQueue
+from solver_hooks import resolve_hooks
 
 def is_valid_side(people):
     """
@@ -31,7 +35,7 @@ def generate_moves(state, N, boat_capacity):
     """
     left, right, boat_pos = state
     if boat_pos == 'L':
-        candidates = list(left)
+        candidates = sorted(left)
         for size in range(1, boat_capacity + 1):
             for moved in itertools.combinations(candidates, size):
                 new_left = set(left) - set(moved)
@@ -39,7 +43,7 @@ def generate_moves(state, N, boat_capacity):
                 if is_valid_state(new_left, new_right):
                     yield (frozenset(new_left), frozenset(new_right), 'R')
     else:
-        candidates = list(right)
+        candidates = sorted(right)
         for size in range(1, boat_capacity + 1):
             for moved in itertools.combinations(candidates, size):
                 new_right = set(right) - set(moved)
@@ -58,29 +62,148 @@ def heuristic(state, N):
     people_on_left = len(left)
     return math.ceil(people_on_left / 2.0)
 
-def astar_search(N, start, goal, boat_capacity):
+def admissible_heuristic(state, boat_capacity):
+    """
+    Lower bound on the number of trips left, taking the boat capacity into account.
+    Every forward trip carries at most boat_capacity people and every return trip
+    brings at least one back, so a round trip moves at most boat_capacity - 1 people.
+    Unlike heuristic() this never overestimates, so weighted A* keeps a provable bound.
+    """
+    left, right, boat_pos = state
+    people_on_left = len(left)
+    if people_on_left == 0:
+        return 0
+    if boat_capacity < 2:
+        return people_on_left
+    if boat_pos == 'L':
+        if people_on_left <= boat_capacity:
+            return 1
+        return 2 * math.ceil((people_on_left - 1) / (boat_capacity - 1)) - 1
+    # The boat has to come back first
+    return 2 * math.ceil(people_on_left / (boat_capacity - 1))
+
+def weighted_astar_search(N, start, goal, boat_capacity, weight, cost_limit=math.inf, deadline=None):
+    """
+    Weighted A* (f = g + weight * h) using admissible_heuristic().
+    States whose unweighted f is at least cost_limit are pruned, so only plans
+    cheaper than the current incumbent are returned. A state reached again
+    with a lower g is re-opened, so finding nothing proves there is no plan
+    cheaper than cost_limit, whatever the weight.
+    Returns (path, num_traversed, completed) where completed is False when the
+    deadline (a time.perf_counter() value) ran out before the search finished.
+    """
+    g_cost = {start: 0}
+    parent = {start: None}
+
+    # Ties on (f, g) are broken first-in first-out instead of by comparing states
+    tie = itertools.count()
+    open_set = []
+    heapq.heappush(open_set, (weight * admissible_heuristic(start, boat_capacity), 0, next(tie), start))
+
+    num_traversed = 0
+
+    while open_set:
+        if deadline is not None and num_traversed % 256 == 0 and time.perf_counter() > deadline:
+            return None, num_traversed, False
+
+        f, g, _, current = heapq.heappop(open_set)
+        num_traversed += 1
+
+        if g > g_cost[current]:
+            # Superseded by a cheaper entry for the same state
+            continue
+
+        if current == goal:
+            path = []
+            while current is not None:
+                path.append(current)
+                current = parent[current]
+            path.reverse()
+            return path, num_traversed, True
+
+        for nxt in generate_moves(current, N, boat_capacity):
+            tentative_g = g + 1
+            if nxt not in g_cost or tentative_g < g_cost[nxt]:
+                h = admissible_heuristic(nxt, boat_capacity)
+                if tentative_g + h >= cost_limit:
+                    continue
+                g_cost[nxt] = tentative_g
+                parent[nxt] = current
+                heapq.heappush(open_set, (tentative_g + weight * h, tentative_g, next(tie), nxt))
+    return None, num_traversed, True
+
+def anytime_astar_search(N, start, goal, boat_capacity, time_budget=1.0, weights=(5.0, 3.0, 2.0, 1.5, 1.0)):
+    """
+    Anytime weighted A*: run weighted A* with decreasing weights, each run only
+    looking for plans shorter than the best one found so far, until the weights
+    or the time budget (seconds) run out.
+    Returns (path, num_traversed, bound, history) where bound is the proven
+    ratio between the length of path and the optimal length.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    best_path = None
+    best_cost = math.inf
+    lower_bound = admissible_heuristic(start, boat_capacity)
+    num_traversed = 0
+    history = []
+
+    for weight in weights:
+        path, traversed, completed = weighted_astar_search(N, start, goal, boat_capacity, weight, best_cost, deadline)
+        num_traversed += traversed
+        if not completed:
+            break
+        if path is None:
+            # Proven: nothing cheaper than the incumbent exists (or no plan at all)
+            lower_bound = best_cost
+        else:
+            best_path = path
+            best_cost = len(path) - 1
+            lower_bound = max(lower_bound, best_cost / weight)
+        if best_path is not None:
+            history.append({
+                "weight": weight,
+                "length": best_cost,
+                "bound": best_cost / lower_bound if lower_bound > 0 else 1.0,
+                "elapsed": round(time.perf_counter() - started, 6)
+            })
+        if best_cost <= lower_bound:
+            break
+
+    if best_path is None:
+        return None, num_traversed, None, history
+    bound = best_cost / lower_bound if lower_bound > 0 else 1.0
+    return best_path, num_traversed, bound, history
+
+def astar_search(N, start, goal, boat_capacity, hooks=None):
     """
     A* search for the Jealous Husbands problem.
     Returns the path and the number of nodes (states) traversed.
     """
+    on_expand, on_generate, on_duplicate, on_layer_complete = resolve_hooks(hooks)
     g_cost = {start: 0}
     parent = {start: None}
     
     start_h = heuristic(start, N)
-    # Priority queue of (f, g, state)
-    open_set = []
-    heapq.heappush(open_set, (start_h, 0, start))
+    # Bucket queue of states keyed by (f, g); each state is queued at most once
+    open_set = BucketQueue()
+    open_set.push(start, start_h, 0)
     visited = set()
     
     num_traversed = 0  
+    layer_f = start_h
 
     while open_set:
-        f, g, current = heapq.heappop(open_set)
+        f, g, current = open_set.pop()
         
         num_traversed += 1  
+        if f != layer_f:
+            if on_layer_complete is not None:
+                on_layer_complete(layer_f, len(open_set) + 1)
+            layer_f = f
+        if on_expand is not None:
+            on_expand(current, g)
         
-        if current in visited:
-            continue
         visited.add(current)
         
         if current == goal:
@@ -93,18 +216,27 @@ def astar_search(N, start, goal, boat_capacity):
             return path, num_traversed
         
         for nxt in generate_moves(current, N, boat_capacity):
+            if nxt in visited:
+                if on_duplicate is not None:
+                    on_duplicate(current, nxt, g)
+                continue
             tentative_g = g + 1
             if nxt not in g_cost or tentative_g < g_cost[nxt]:
                 g_cost[nxt] = tentative_g
                 parent[nxt] = current
                 h = heuristic(nxt, N)
                 f = tentative_g + h
-                heapq.heappush(open_set, (f, tentative_g, nxt))
+                open_set.push(nxt, f, tentative_g)
+                if on_generate is not None:
+                    on_generate(current, nxt, g)
+            elif on_duplicate is not None:
+                on_duplicate(current, nxt, g)
     return None, num_traversed
 
-def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos='L'):
+def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos='L', hooks=None):
     """
     Solve the Jealous Husbands problem using A* search with a potentially arbitrary initial state.
+    hooks is an optional instrumentation object (see solver_hooks.py).
       
     Returns a dictionary with:
       "output": <solution_path_dict> or None if no solution,
@@ -123,7 +255,7 @@ def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos
     start = (left, right, boat_pos)
     goal = (frozenset(), frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)]), 'R')
     
-    path, num_traversed = astar_search(N, start, goal, boat_capacity)
+    path, num_traversed = astar_search(N, start, goal, boat_capacity, hooks)
     if path is None:
         return {"output": None, "number_of_states": num_traversed, "N": N}
     
@@ -136,6 +268,45 @@ def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos
         }
     return {"output": output, "number_of_states": num_traversed, "N": N}
 
+def solve_jealous_husbands_anytime(N=3, boat_capacity=2, left=None, right=None, boat_pos='L', time_budget=1.0):
+    """
+    Solve the Jealous Husbands problem with anytime weighted A*, returning the
+    best plan found within time_budget seconds.
+
+    Returns a dictionary with:
+      "output": <solution_path_dict> or None if no plan was found in time,
+      "number_of_states": <int> (number of states traversed over all runs),
+      "N": N,
+      "suboptimality_bound": proven upper bound on len(plan) / len(optimal plan), or None,
+      "history": one entry per improvement with the weight, plan length, bound and elapsed seconds
+    """
+    if left is None:
+        left = frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)])
+    else:
+        left = frozenset(tuple(p) for p in left)
+    if right is None:
+        right = frozenset()
+    else:
+        right = frozenset(tuple(p) for p in right)
+
+    start = (left, right, boat_pos)
+    goal = (frozenset(), frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)]), 'R')
+
+    path, num_traversed, bound, history = anytime_astar_search(N, start, goal, boat_capacity, time_budget)
+    if path is None:
+        return {"output": None, "number_of_states": num_traversed, "N": N,
+                "suboptimality_bound": None, "history": history}
+
+    output = {}
+    for i, (l, r, bp) in enumerate(path):
+        output[str(i)] = {
+            'left_bank': sorted(list(l)),
+            'right_bank': sorted(list(r)),
+            'boat_position': bp
+        }
+    return {"output": output, "number_of_states": num_traversed, "N": N,
+            "suboptimality_bound": bound, "history": history}
+
 if __name__ == "__main__":
     N = 4
     boat_capacity = 4
@@ -1,6 +1,11 @@
 from collections import deque
 import itertools
 
+import frontier_search
+import jealous_husbands_packed
+import jealous_husbands_vectorized
+from solver_hooks import resolve_hooks
+
 def is_valid_side(people):
     """
     Check if the given side (set of (Gender, ID)) satisfies the jealous husbands constraint.
@@ -32,7 +37,7 @@ def generate_moves(state, N, boat_capacity):
     left, right, boat_pos = state
     if boat_pos == 'L':
         # Move people from left to right
-        candidates = list(left)
+        candidates = sorted(left)
         for size in range(1, boat_capacity + 1):
             for moved in itertools.combinations(candidates, size):
                 new_left = set(left) - set(moved)
@@ -41,7 +46,7 @@ def generate_moves(state, N, boat_capacity):
                     yield (frozenset(new_left), frozenset(new_right), 'R')
     else:
         # Move people from right to left
-        candidates = list(right)
+        candidates = sorted(right)
         for size in range(1, boat_capacity + 1):
             for moved in itertools.combinations(candidates, size):
                 new_right = set(right) - set(moved)
@@ -49,37 +54,26 @@ def generate_moves(state, N, boat_capacity):
                 if is_valid_state(new_left, new_right):
                     yield (frozenset(new_left), frozenset(new_right), 'L')
 
-def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos='L'):
+def bfs(N, start, goal, boat_capacity, hooks=None):
     """
-    Solve the jealous husbands problem using BFS with a possibly arbitrary initial state.
-
-    Returns a dictionary:
-        "output": A dictionary representation of the path if a solution is found, otherwise None
-        "number_of_states_traversed": Number of states traversed during the BFS
-        "N": number of couples
+    Breadth-first search from start to goal.
+    Returns:
+        (path, number_of_states_traversed)
     """
-    if left is None:
-        left = frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)])
-    else:
-        left = frozenset(tuple(p) for p in left)
-        
-    if right is None:
-        right = frozenset()
-    else:
-        right = frozenset(tuple(p) for p in right)
-        
-    start = (left, right, boat_pos)
-    goal = (frozenset(), frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)]), 'R')
-    
-    # BFS
+    on_expand, on_generate, on_duplicate, on_layer_complete = resolve_hooks(hooks)
     queue = deque([start])
     visited = set([start])
     parent = {start: None}
     states_traversed = 0  
+    depth = 0
+    layer_left = 1  # states of the current depth still in the queue
+    next_layer = 0
 
     while queue:
         state = queue.popleft()
         states_traversed += 1  
+        if on_expand is not None:
+            on_expand(state, depth)
         
         if state == goal:
             # Reconstruct path
@@ -89,16 +83,7 @@ def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos
                 path.append(cur)
                 cur = parent[cur]
             path.reverse()
-            
-
-            output = {}
-            for i, (l, r, bp) in enumerate(path):
-                output[str(i)] = {
-                    'left_bank': sorted(list(l)),
-                    'right_bank': sorted(list(r)),
-                    'boat_position': bp
-                }
-            return {"output": output, "number_of_states": states_traversed, "N": N}
+            return path, states_traversed
         
         # Generate next moves
         for nxt in generate_moves(state, N, boat_capacity):
@@ -106,8 +91,70 @@ def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos
                 visited.add(nxt)
                 parent[nxt] = state
                 queue.append(nxt)
+                next_layer += 1
+                if on_generate is not None:
+                    on_generate(state, nxt, depth)
+            elif on_duplicate is not None:
+                on_duplicate(state, nxt, depth)
+
+        layer_left -= 1
+        if layer_left == 0:
+            if on_layer_complete is not None:
+                on_layer_complete(depth, next_layer)
+            depth += 1
+            layer_left, next_layer = next_layer, 0
+    
+    return None, states_traversed
+
+def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos='L', memory_lean=False, hooks=None,
+                           vectorized=False):
+    """
+    Solve the jealous husbands problem using BFS with a possibly arbitrary initial state.
+    With memory_lean=True, a frontier-only divide-and-conquer BFS is used instead:
+    it finds a plan of the same optimal length without keeping a parent map.
+    With vectorized=True, a level-synchronous BFS expands whole layers at once
+    with NumPy (see jealous_husbands_vectorized.py).
+    hooks is an optional instrumentation object (see solver_hooks.py); it is not
+    called by the memory-lean search, and the vectorized search only calls
+    on_layer_complete.
+
+    Returns a dictionary:
+        "output": A dictionary representation of the path if a solution is found, otherwise None
+        "number_of_states_traversed": Number of states traversed during the BFS
+        "N": number of couples
+    """
+    if left is None:
+        left = frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)])
+    else:
+        left = frozenset(tuple(p) for p in left)
+        
+    if right is None:
+        right = frozenset()
+    else:
+        right = frozenset(tuple(p) for p in right)
+        
+    start = (left, right, boat_pos)
+    goal = (frozenset(), frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)]), 'R')
     
-    return {"output": None, "number_of_states": states_traversed, "N": N}
+    if vectorized:
+        path_codes, states_traversed = jealous_husbands_vectorized.level_synchronous_bfs(
+            N, jealous_husbands_packed.encode_state(start, N), jealous_husbands_packed.encode_state(goal, N), boat_capacity, hooks)
+        path = None if path_codes is None else [jealous_husbands_packed.decode_state(code, N) for code in path_codes]
+    elif memory_lean:
+        path, states_traversed = frontier_search.divide_and_conquer_bfs(start, goal, lambda state: generate_moves(state, N, boat_capacity))
+    else:
+        path, states_traversed = bfs(N, start, goal, boat_capacity, hooks)
+    if path is None:
+        return {"output": None, "number_of_states": states_traversed, "N": N}
+
+    output = {}
+    for i, (l, r, bp) in enumerate(path):
+        output[str(i)] = {
+            'left_bank': sorted(list(l)),
+            'right_bank': sorted(list(r)),
+            'boat_position': bp
+        }
+    return {"output": output, "number_of_states": states_traversed, "N": N}
 
 
 if __name__ == "__main__":
@@ -1,5 +1,10 @@
 from itertools import combinations
 import sys
+
+import approximate_visited
+import jealous_husbands_packed
+from solver_hooks import resolve_hooks
+
 sys.setrecursionlimit(10**6)
 
 
@@ -31,7 +36,7 @@ def generate_moves(state, N, boat_capacity):
     """
     left, right, boat_pos = state
     if boat_pos == 'L':
-        candidates = list(left)
+        candidates = sorted(left)
         for size in range(1, boat_capacity + 1):
             for moved in combinations(candidates, size):
                 new_left = set(left) - set(moved)
@@ -39,7 +44,7 @@ def generate_moves(state, N, boat_capacity):
                 if is_valid_state(new_left, new_right):
                     yield (frozenset(new_left), frozenset(new_right), 'R')
     else:
-        candidates = list(right)
+        candidates = sorted(right)
         for size in range(1, boat_capacity + 1):
             for moved in combinations(candidates, size):
                 new_right = set(right) - set(moved)
@@ -48,13 +53,19 @@ def generate_moves(state, N, boat_capacity):
                     yield (frozenset(new_left), frozenset(new_right), 'L')
 
 
-def dfs_recursive(current, goal, N, boat_capacity, visited, parent, states_traversed):
+def dfs_recursive(current, goal, N, boat_capacity, visited, parent, states_traversed, hooks=(None, None, None, None), depth=0):
     """
     Recursive DFS that counts the number of states TRAVERSED, not generated.
     Each time we process a state (current), we increment states_traversed.
+    hooks is the tuple returned by solver_hooks.resolve_hooks.
+    visited only needs add() and `in`, so it may be an approximate visited set.
+    parent only holds the current path: entries are removed again on backtracking.
     """
+    on_expand, on_generate, on_duplicate, _ = hooks
     # Mark this state as traversed
     states_traversed[0] += 1
+    if on_expand is not None:
+        on_expand(current, depth)
     
     if current == goal:
         return True
@@ -68,14 +79,24 @@ def dfs_recursive(current, goal, N, boat_capacity, visited, parent, states_trave
     for nxt in moves:
         if nxt not in visited:
             parent[nxt] = current
-            if dfs_recursive(nxt, goal, N, boat_capacity, visited, parent, states_traversed):
+            if on_generate is not None:
+                on_generate(current, nxt, depth)
+            if dfs_recursive(nxt, goal, N, boat_capacity, visited, parent, states_traversed, hooks, depth + 1):
                 return True
+            del parent[nxt]
+        elif on_duplicate is not None:
+            on_duplicate(current, nxt, depth)
     return False
 
-def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos='L'):
+def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos='L', hooks=None,
+                           visited_memory=None, false_positive_rate=0.01):
     """
     Solve the Jealous Husbands problem using a normal (recursive) DFS, 
     and return the number of states TRAVERSED.
+    hooks is an optional instrumentation object (see solver_hooks.py).
+    With visited_memory (in bytes), visited states are kept in a Bloom filter
+    of that size instead of a set (see approximate_visited.py). The search may
+    then miss a plan, and the result also reports "estimated_false_prunes".
     """
     if left is None:
         left = frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)])
@@ -90,11 +111,14 @@ def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos
     start = (left, right, boat_pos)
     goal = (frozenset(), frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)]), 'R')
     
-    visited = set()
+    visited = approximate_visited.visited_set(visited_memory, false_positive_rate,
+                                              lambda state: jealous_husbands_packed.encode_state(state, N).to_bytes(N // 4 + 1, "little"))
     parent = {start: None}
     states_traversed = [0]  
 
-    if dfs_recursive(start, goal, N, boat_capacity, visited, parent, states_traversed):
+    found = dfs_recursive(start, goal, N, boat_capacity, visited, parent, states_traversed, resolve_hooks(hooks))
+    extra = {} if visited_memory is None else {"estimated_false_prunes": visited.stats()["estimated_false_prunes"]}
+    if found:
         path = []
         current = goal
         while current is not None:
@@ -109,9 +133,9 @@ def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos
                 'right_bank': sorted(list(r)),
                 'boat_position': bp
             }
-        return {"output": output, "number_of_states": states_traversed[0], "N": N}
+        return dict({"output": output, "number_of_states": states_traversed[0], "N": N}, **extra)
     else:
-        return {"output": None, "number_of_states": states_traversed[0], "N": N}
+        return dict({"output": None, "number_of_states": states_traversed[0], "N": N}, **extra)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,218 @@
+from array import array
+from bisect import bisect_left
+import heapq
+import mmap
+import os
+import tempfile
+
+from jealous_husbands_packed import decode_state, encode_state, generate_packed_moves
+
+# Rough cost of one buffered state while a run is sorted (a Python int in a list)
+BYTES_PER_BUFFERED_STATE = 48
+
+
+class _Layer:
+    """
+    A sorted, duplicate-free BFS layer of packed states stored in a file and
+    read back through a read-only memory map.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.states = memoryview(self._map).cast('Q')
+        else:
+            self._map = None
+            self.states = memoryview(array('Q').tobytes()).cast('Q')
+
+    def __len__(self):
+        return len(self.states)
+
+    def __contains__(self, code):
+        i = bisect_left(self.states, code)
+        return i < len(self.states) and self.states[i] == code
+
+    def close(self):
+        self.states.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+def _write_sorted(path, codes):
+    with open(path, 'wb') as f:
+        array('Q', codes).tofile(f)
+
+def _write_stream(path, codes, chunk_size):
+    """
+    Write an iterator of codes to path in chunks; returns the number written.
+    """
+    written = 0
+    buffer = array('Q')
+    with open(path, 'wb') as f:
+        for code in codes:
+            buffer.append(code)
+            if len(buffer) >= chunk_size:
+                buffer.tofile(f)
+                written += len(buffer)
+                buffer = array('Q')
+        buffer.tofile(f)
+        written += len(buffer)
+    return written
+
+def _unique(codes):
+    last = None
+    for code in codes:
+        if code != last:
+            yield code
+            last = code
+
+def _difference(codes, *layers):
+    """
+    Sorted merge: drop codes present in any of the sorted layers.
+    """
+    positions = [0] * len(layers)
+    for code in codes:
+        seen = False
+        for i, layer in enumerate(layers):
+            states = layer.states
+            j = positions[i]
+            while j < len(states) and states[j] < code:
+                j += 1
+            positions[i] = j
+            if j < len(states) and states[j] == code:
+                seen = True
+        if not seen:
+            yield code
+
+def _expand_layer(layer, previous, N, boat_capacity, work_dir, depth, max_buffered):
+    """
+    Generate the next layer: successors are buffered up to max_buffered, sorted
+    and spilled as runs, then the runs are merged, deduplicated and merged
+    against the two previous layers. Moves are reversible, so a successor that
+    was seen before can only be in the current or the previous layer.
+    """
+    runs = []
+    buffer = []
+
+    def spill():
+        path = os.path.join(work_dir, "run_%d_%d.bin" % (depth, len(runs)))
+        _write_sorted(path, _unique(sorted(buffer)))
+        runs.append(_Layer(path))
+        buffer.clear()
+
+    for code in layer.states:
+        for nxt in generate_packed_moves(code, N, boat_capacity):
+            buffer.append(nxt)
+            if len(buffer) >= max_buffered:
+                spill()
+    if buffer:
+        spill()
+
+    path = os.path.join(work_dir, "layer_%d.bin" % depth)
+    merged = _unique(heapq.merge(*(iter(run.states) for run in runs)))
+    seen_layers = [layer] if previous is None else [previous, layer]
+    _write_stream(path, _difference(merged, *seen_layers), max(1024, max_buffered))
+    for run in runs:
+        run.close()
+        os.remove(run.path)
+    return _Layer(path)
+
+def external_bfs(N, start, goal, boat_capacity, memory_limit, work_dir):
+    """
+    Level-synchronous BFS over packed states where every layer lives on disk.
+    Only one layer's worth of successors, capped by memory_limit bytes, is held
+    in memory at a time. The path is rebuilt by scanning the layers backwards.
+    Returns (path_codes, number_of_states_traversed).
+    """
+    max_buffered = max(1024, memory_limit // BYTES_PER_BUFFERED_STATE)
+    path = os.path.join(work_dir, "layer_0.bin")
+    _write_sorted(path, [start])
+    layers = [_Layer(path)]
+    states_traversed = 0
+
+    try:
+        while goal not in layers[-1]:
+            if len(layers[-1]) == 0:
+                return None, states_traversed
+            states_traversed += len(layers[-1])
+            previous = layers[-2] if len(layers) > 1 else None
+            layers.append(_expand_layer(layers[-1], previous, N, boat_capacity, work_dir, len(layers), max_buffered))
+        states_traversed += 1
+
+        # Backward layer scan: any neighbor on the previous layer is a valid parent
+        path_codes = [goal]
+        current = goal
+        for depth in range(len(layers) - 2, 0, -1):
+            for nxt in generate_packed_moves(current, N, boat_capacity):
+                if nxt in layers[depth]:
+                    current = nxt
+                    break
+            path_codes.append(current)
+        if len(layers) > 1:
+            path_codes.append(start)
+        path_codes.reverse()
+        return path_codes, states_traversed
+    finally:
+        for layer in layers:
+            layer.close()
+
+def solve_jealous_husbands(N=3, boat_capacity=2, left=None, right=None, boat_pos='L',
+                           memory_limit=64 * 1024 * 1024, work_dir=None):
+    """
+    Solve the jealous husbands problem using a disk-backed BFS, for state spaces
+    that do not fit in memory. Layers are kept as sorted files of packed states
+    in a temporary directory (inside work_dir if given), and at most about
+    memory_limit bytes of successors are buffered before spilling to disk.
+
+    Returns the same dictionary as jealous_husbands_bfs.solve_jealous_husbands.
+    """
+    if 2 * N + 1 > 64:
+        raise ValueError("external BFS packs states into 64 bits, so N must be at most 31")
+    if left is None:
+        left = frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)])
+    else:
+        left = frozenset(tuple(p) for p in left)
+
+    if right is None:
+        right = frozenset()
+    else:
+        right = frozenset(tuple(p) for p in right)
+
+    start = encode_state((left, right, boat_pos), N)
+    goal = encode_state((frozenset(), frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)]), 'R'), N)
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as layer_dir:
+        path_codes, states_traversed = external_bfs(N, start, goal, boat_capacity, memory_limit, layer_dir)
+
+    if path_codes is None:
+        return {"output": None, "number_of_states": states_traversed, "N": N}
+
+    output = {}
+    for i, code in enumerate(path_codes):
+        l, r, bp = decode_state(code, N)
+        output[str(i)] = {
+            'left_bank': sorted(list(l)),
+            'right_bank': sorted(list(r)),
+            'boat_position': bp
+        }
+    return {"output": output, "number_of_states": states_traversed, "N": N}
+
+
+if __name__ == "__main__":
+    N = 4
+    boat_capacity = 4
+    left_bank = [["H",1], ["W",1], ["H",2], ["W",2]]
+    right_bank = [["H",3], ["W",3], ["H",4], ["W",4]]
+    boat_position = 'R'
+
+    result = solve_jealous_husbands(N=N, boat_capacity=boat_capacity, left=left_bank, right=right_bank, boat_pos=boat_position)
+    if result["output"] is not None:
+        for step, val in result["output"].items():
+            print(step, val)
+        print("Number of states traversed:", result["number_of_states"])
+    else:
+        print("No solution found.")
+        print("Number of states traversed:", result["number_of_states"])
@@ -0,0 +1,69 @@
+"""
+Packed integer encoding of Jealous Husbands states.
+
+Bit i - 1 is set when husband H_i is on the right bank, bit N + i - 1 when his
+wife W_i is, and bit 2N when the boat is on the right. Packed states are cheap
+to hash, sort and store in flat arrays.
+"""
+from itertools import combinations
+
+
+def person_bit(person, N):
+    gender, i = person
+    return i - 1 if gender == 'H' else N + i - 1
+
+def encode_state(state, N):
+    """
+    Pack a (left, right, boat_pos) state into an integer.
+    """
+    left, right, boat_pos = state
+    code = 0
+    for person in right:
+        code |= 1 << person_bit(tuple(person), N)
+    if boat_pos == 'R':
+        code |= 1 << (2 * N)
+    return code
+
+def decode_state(code, N):
+    """
+    Unpack an integer back into a (left, right, boat_pos) state.
+    """
+    left = []
+    right = []
+    for i in range(1, N + 1):
+        (right if code >> (i - 1) & 1 else left).append(('H', i))
+    for i in range(1, N + 1):
+        (right if code >> (N + i - 1) & 1 else left).append(('W', i))
+    return (frozenset(left), frozenset(right), 'R' if code >> (2 * N) & 1 else 'L')
+
+def is_valid_side(people, N):
+    """
+    Jealous husbands constraint on a bank given as a bitmask of the people on it:
+    a wife without her husband cannot be with any other man.
+    """
+    husbands = people & ((1 << N) - 1)
+    lone_wives = (people >> N) & ~husbands
+    return lone_wives == 0 or husbands == 0
+
+def is_valid_code(code, N):
+    everyone = (1 << (2 * N)) - 1
+    right = code & everyone
+    return is_valid_side(right, N) and is_valid_side(everyone & ~right, N)
+
+def generate_packed_moves(code, N, boat_capacity):
+    """
+    Packed equivalent of generate_moves: yield the codes of every valid state
+    reached by moving 1 up to boat_capacity people across with the boat.
+    """
+    everyone = (1 << (2 * N)) - 1
+    boat_bit = 1 << (2 * N)
+    if code & boat_bit:
+        side = code & everyone
+    else:
+        side = everyone & ~code
+    bits = [1 << b for b in range(2 * N) if side >> b & 1]
+    for size in range(1, boat_capacity + 1):
+        for moved in combinations(bits, size):
+            nxt = (code ^ sum(moved)) ^ boat_bit
+            if is_valid_code(nxt, N):
+                yield nxt
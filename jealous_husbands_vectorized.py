@@ -0,0 +1,108 @@
+"""
+Batched NumPy successor generation for the Jealous Husbands problem.
+
+States use the packed encoding of jealous_husbands_packed. A whole BFS layer
+is expanded at once: every parent is combined with every precomputed boatload
+mask by broadcasting, the husband/wife constraint is checked with vectorized
+bit arithmetic, and children are deduplicated with np.unique and a sorted
+visited array.
+"""
+from itertools import combinations
+
+import numpy as np
+
+from solver_hooks import resolve_hooks
+
+# Upper bound on parent x boatload pairs materialized at once (about 8 bytes each)
+MAX_PAIRS_PER_CHUNK = 1 << 22
+
+
+def boatload_masks(N, boat_capacity):
+    """
+    Bitmasks of every group of 1 up to boat_capacity people.
+    """
+    masks = []
+    for size in range(1, min(boat_capacity, 2 * N) + 1):
+        for group in combinations(range(2 * N), size):
+            masks.append(sum(1 << b for b in group))
+    return np.array(masks, dtype=np.uint64)
+
+def valid_codes(codes, N):
+    """
+    Boolean array: which packed states satisfy the constraint on both banks.
+    """
+    everyone = np.uint64((1 << (2 * N)) - 1)
+    husbands_mask = np.uint64((1 << N) - 1)
+    shift = np.uint64(N)
+    valid = np.ones(codes.shape, dtype=bool)
+    for side in (codes & everyone, ~codes & everyone):
+        husbands = side & husbands_mask
+        lone_wives = (side >> shift) & ~husbands & husbands_mask
+        valid &= (lone_wives == 0) | (husbands == 0)
+    return valid
+
+def expand(parents, loads, N, max_pairs=MAX_PAIRS_PER_CHUNK):
+    """
+    All valid children of an array of packed parents.
+    Returns (children, parent_index) where parent_index[i] is the position in
+    parents of the state children[i] was generated from.
+    """
+    everyone = np.uint64((1 << (2 * N)) - 1)
+    boat_bit = np.uint64(1 << (2 * N))
+    chunk = max(1, max_pairs // max(1, len(loads)))
+    children = []
+    parent_index = []
+    for begin in range(0, len(parents), chunk):
+        block = parents[begin:begin + chunk]
+        on_right = (block & boat_bit) != 0
+        # People on the bank the boat is at
+        side = np.where(on_right, block & everyone, ~block & everyone)
+        # Only boatloads made of people on that bank, then the constraint on the results
+        rows, cols = np.nonzero((loads[None, :] & ~side[:, None]) == 0)
+        candidates = (block[rows] ^ loads[cols]) ^ boat_bit
+        keep = valid_codes(candidates, N)
+        children.append(candidates[keep])
+        parent_index.append(rows[keep] + begin)
+    if not children:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    return np.concatenate(children), np.concatenate(parent_index)
+
+def level_synchronous_bfs(N, start, goal, boat_capacity, hooks=None):
+    """
+    BFS over packed states that expands a whole layer per call to expand().
+    Each layer is stored as sorted codes with the code of each one's parent,
+    so the path is rebuilt with one binary search per layer.
+    Returns (path_codes, number_of_states_traversed).
+    """
+    if 2 * N + 1 > 64:
+        raise ValueError("vectorized BFS packs states into 64 bits, so N must be at most 31")
+    _, _, _, on_layer_complete = resolve_hooks(hooks)
+    loads = boatload_masks(N, boat_capacity)
+    goal = np.uint64(goal)
+    frontier = np.array([start], dtype=np.uint64)
+    visited = frontier.copy()
+    layers = [(frontier, np.array([start], dtype=np.uint64))]
+    states_traversed = 0
+
+    while not np.any(frontier == goal):
+        if len(frontier) == 0:
+            return None, states_traversed
+        states_traversed += len(frontier)
+        children, parent_index = expand(frontier, loads, N)
+        # np.unique sorts; return_index keeps the first parent that produced each child
+        children, first = np.unique(children, return_index=True)
+        parents = frontier[parent_index[first]]
+        fresh = ~np.isin(children, visited, assume_unique=True)
+        frontier = children[fresh]
+        layers.append((frontier, parents[fresh]))
+        visited = np.union1d(visited, frontier)
+        if on_layer_complete is not None:
+            on_layer_complete(len(layers) - 2, len(frontier))
+    states_traversed += 1
+
+    path_codes = [int(goal)]
+    for codes, parents in reversed(layers[1:]):
+        i = int(np.searchsorted(codes, np.uint64(path_codes[-1])))
+        path_codes.append(int(parents[i]))
+    path_codes.reverse()
+    return path_codes, states_traversed
@@ -0,0 +1,272 @@
+"""
+Concurrent load generator for the river crossing API.
+
+Drives /missionary-cannibal and /jealous-husband with a weighted mix of
+instances at one or more concurrency levels, reusing one keep-alive
+connection per worker, and reports throughput, latency percentiles, error
+rates and the saturation point as JSON.
+
+    python load_test.py --spawn --concurrency 1,2,4,8 --duration 10
+    python load_test.py --url http://127.0.0.1:5000 --rate 50 --mix mix.json --output report.json
+
+A mix file is a JSON list of {"endpoint": ..., "payload": {...}, "weight": ...}.
+"""
+import argparse
+import http.client
+import json
+import logging
+import math
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def default_mix():
+    """
+    A small mix of cheap and moderately expensive instances of both puzzles.
+    """
+    mix = []
+    for N, boat_capacity in [(3, 2), (5, 3), (6, 4)]:
+        for solver in ["bfs", "dfs", "a_star"]:
+            mix.append({
+                "endpoint": "/missionary-cannibal",
+                "weight": 1,
+                "payload": {
+                    "M_total": N, "C_total": N, "M_left": N, "C_left": N, "M_right": 0, "C_right": 0,
+                    "boat_position": "left", "boat_capacity": boat_capacity, "solver": solver
+                }
+            })
+    for N, boat_capacity in [(3, 2), (4, 3), (5, 3)]:
+        for solver in ["bfs", "dfs", "a_star"]:
+            mix.append({
+                "endpoint": "/jealous-husband",
+                "weight": 1,
+                "payload": {
+                    "num_of_couples": N, "boat_capacity": boat_capacity, "solver": solver,
+                    "stage": {
+                        "left_bank": [["H", i] for i in range(1, N+1)] + [["W", i] for i in range(1, N+1)],
+                        "right_bank": [],
+                        "boat_position": "L"
+                    }
+                }
+            })
+    return mix
+
+def load_mix(path):
+    with open(path) as f:
+        mix = json.load(f)
+    for entry in mix:
+        entry.setdefault("weight", 1)
+    return mix
+
+def percentile(sorted_values, p):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class _Worker(threading.Thread):
+    """
+    Sends requests over a single keep-alive connection. In closed-loop mode it
+    sends back to back until the deadline; in open-loop mode it takes scheduled
+    send times from a queue and measures latency from the scheduled time, so
+    queueing delay on an overloaded server is not hidden.
+    """
+
+    def __init__(self, host, port, mix, weights, deadline, schedule, seed):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.mix = mix
+        self.weights = weights
+        self.deadline = deadline
+        self.schedule = schedule
+        self.rng = random.Random(seed)
+        self.samples = []   # (endpoint, latency seconds, ok, status)
+        self.connection = None
+
+    def _send(self, entry):
+        body = json.dumps(entry["payload"])
+        headers = {"Content-Type": "application/json", "Accept-Encoding": "gzip"}
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.connection.request("POST", entry["endpoint"], body=body, headers=headers)
+                response = self.connection.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, OSError):
+                self.connection.close()
+                self.connection = None
+                if attempt == 1:
+                    raise
+
+    def run(self):
+        while True:
+            if self.schedule is None:
+                if time.perf_counter() >= self.deadline:
+                    break
+                scheduled = time.perf_counter()
+            else:
+                scheduled = self.schedule.get()
+                if scheduled is None:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            entry = self.rng.choices(self.mix, weights=self.weights)[0]
+            try:
+                status = self._send(entry)
+                ok = 200 <= status < 400
+            except (http.client.HTTPException, OSError):
+                status, ok = None, False
+            self.samples.append((entry["endpoint"], time.perf_counter() - scheduled, ok, status))
+        if self.connection is not None:
+            self.connection.close()
+
+def run_stage(url, mix, concurrency, duration, rate=None, seed=0):
+    """
+    Run one load stage and return its report. Without rate, each of the
+    concurrency workers sends requests back to back (closed loop); with rate,
+    requests are sent on a Poisson schedule of rate requests per second
+    (open loop) and served by up to concurrency workers.
+    """
+    parsed = urlparse(url)
+    weights = [entry["weight"] for entry in mix]
+    started = time.perf_counter()
+    deadline = started + duration
+
+    schedule = None
+    if rate:
+        schedule = queue.Queue()
+        rng = random.Random(seed)
+        t = started
+        while True:
+            t += rng.expovariate(rate)
+            if t >= deadline:
+                break
+            schedule.put(t)
+        for _ in range(concurrency):
+            schedule.put(None)
+
+    workers = [_Worker(parsed.hostname, parsed.port or 80, mix, weights, deadline, schedule, seed * 1000 + i)
+               for i in range(concurrency)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    samples = [sample for worker in workers for sample in worker.samples]
+    report = _summarize(samples, elapsed)
+    report.update({"concurrency": concurrency, "offered_rate": rate, "duration": round(elapsed, 3)})
+    report["endpoints"] = {
+        endpoint: _summarize([s for s in samples if s[0] == endpoint], elapsed)
+        for endpoint in sorted({s[0] for s in samples})
+    }
+    return report
+
+def _summarize(samples, elapsed):
+    latencies = sorted(latency for _, latency, ok, _ in samples if ok)
+    errors = sum(1 for _, _, ok, _ in samples if not ok)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1]) if latencies else None
+        }
+    }
+
+def find_saturation(stages, min_gain=0.05):
+    """
+    First stage after which adding load no longer raises throughput by at
+    least min_gain (relative), or None if throughput kept growing.
+    """
+    for previous, current in zip(stages, stages[1:]):
+        if previous["throughput"] <= 0:
+            continue
+        if current["throughput"] < previous["throughput"] * (1 + min_gain):
+            return {
+                "concurrency": previous["concurrency"],
+                "offered_rate": previous["offered_rate"],
+                "throughput": previous["throughput"],
+                "p99_ms": previous["latency_ms"]["p99"]
+            }
+    return None
+
+def _spawn_server():
+    """
+    Start app.py in this process on a free local port; returns (url, server).
+    app.py prints every request, so stdout is sent to os.devnull until the
+    server is stopped (see _stop_server), keeping the report on stdout clean.
+    """
+    from werkzeug.serving import make_server
+    import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    sys.stdout = open(os.devnull, "w")
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return "http://127.0.0.1:%d" % server.server_port, server
+
+def _stop_server(server, stdout):
+    server.shutdown()
+    server.server_close()
+    sys.stdout.close()
+    sys.stdout = stdout
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the river crossing API.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="base URL of a running server")
+    parser.add_argument("--spawn", action="store_true", help="start app.py in-process on a free local port instead (shares the GIL with the load generator, so for smoke tests only)")
+    parser.add_argument("--mix", help="JSON file with the instance mix (default: built-in mix)")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="comma separated concurrency levels, one stage each")
+    parser.add_argument("--rate", type=float, help="open-loop arrival rate in requests per second (default: closed loop)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    mix = load_mix(args.mix) if args.mix else default_mix()
+    stdout = sys.stdout
+    url, server = _spawn_server() if args.spawn else (args.url, None)
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    stages = []
+    try:
+        for level in levels:
+            stage = run_stage(url, mix, level, args.duration, args.rate, args.seed)
+            stages.append(stage)
+            print("concurrency=%d throughput=%.1f req/s p50=%s ms p95=%s ms p99=%s ms errors=%d"
+                  % (level, stage["throughput"], stage["latency_ms"]["p50"], stage["latency_ms"]["p95"],
+                     stage["latency_ms"]["p99"], stage["errors"]), file=sys.stderr)
+    finally:
+        if server is not None:
+            _stop_server(server, stdout)
+
+    report = {"url": url, "mix_size": len(mix), "stages": stages, "saturation": find_saturation(stages)}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
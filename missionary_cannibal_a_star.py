@@ -1,6 +1,8 @@
-import heapq
 import math
 
+from bucket_queue import BucketQueue
+from solver_hooks import resolve_hooks
+
 def is_valid_state(M_left, C_left, M_right, C_right, M_total, C_total):
     # Check invalid counts
     if M_left < 0 or C_left < 0 or M_right < 0 or C_right < 0:
@@ -62,28 +64,35 @@ def heuristic(state, M_total, C_total):
     people_left = M_left + C_left
     return math.ceil(people_left / 2.0)
 
-def astar_search(M_total, C_total, start_state, goal_state, boat_capacity):
+def astar_search(M_total, C_total, start_state, goal_state, boat_capacity, hooks=None):
     """
     A* search to find the shortest path from start_state to goal_state.
     Returns:
       path: The sequence of states from start to goal.
       num_traversed: Number of states traversed (popped from the priority queue).
     """
-    open_heap = []
+    on_expand, on_generate, on_duplicate, on_layer_complete = resolve_hooks(hooks)
+    # Bucket queue of states keyed by (f, g); each state is queued at most once
+    open_heap = BucketQueue()
     g_cost = {start_state: 0}
     parent = {start_state: None}
     
     start_h = heuristic(start_state, M_total, C_total)
-    heapq.heappush(open_heap, (start_h, 0, start_state))
+    open_heap.push(start_state, start_h, 0)
     visited = set()
     num_traversed = 0  
+    layer_f = start_h
 
     while open_heap:
-        f, g, current = heapq.heappop(open_heap)
+        f, g, current = open_heap.pop()
         num_traversed += 1  
+        if f != layer_f:
+            if on_layer_complete is not None:
+                on_layer_complete(layer_f, len(open_heap) + 1)
+            layer_f = f
+        if on_expand is not None:
+            on_expand(current, g)
 
-        if current in visited:
-            continue
         visited.add(current)
         
         # Check if goal reached
@@ -98,20 +107,30 @@ def astar_search(M_total, C_total, start_state, goal_state, boat_capacity):
         
         # Explore neighbors
         for nxt in get_next_states(current, M_total, C_total, boat_capacity):
+            if nxt in visited:
+                if on_duplicate is not None:
+                    on_duplicate(current, nxt, g)
+                continue
             tentative_g = g + 1
             if nxt not in g_cost or tentative_g < g_cost[nxt]:
                 g_cost[nxt] = tentative_g
                 parent[nxt] = current
                 h = heuristic(nxt, M_total, C_total)
                 f = tentative_g + h
-                heapq.heappush(open_heap, (f, tentative_g, nxt))
+                open_heap.push(nxt, f, tentative_g)
+                if on_generate is not None:
+                    on_generate(current, nxt, g)
+            elif on_duplicate is not None:
+                on_duplicate(current, nxt, g)
 
     return None, num_traversed
 
 def solve_missionaries_cannibals(M_total=3, C_total=3, boat_capacity=2, 
-                                M_left=None, C_left=None, M_right=None, C_right=None, boat_position='left'):
+                                M_left=None, C_left=None, M_right=None, C_right=None, boat_position='left',
+                                hooks=None):
     """
     Solve the missionaries and cannibals problem using A* search.
+    hooks is an optional instrumentation object (see solver_hooks.py).
     
     Returns:
       {
@@ -132,7 +151,7 @@ def solve_missionaries_cannibals(M_total=3, C_total=3, boat_capacity=2,
     start_state = (M_left, C_left, M_right, C_right, boat_position)
     goal_state = (0, 0, M_total, C_total, 'right')
     
-    solution_path, num_traversed = astar_search(M_total, C_total, start_state, goal_state, boat_capacity)
+    solution_path, num_traversed = astar_search(M_total, C_total, start_state, goal_state, boat_capacity, hooks)
     if solution_path is None:
         print("No solution found.")
         return {"output": None, "number_of_states": num_traversed, "N": M_total}
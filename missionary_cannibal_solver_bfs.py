@@ -1,5 +1,8 @@
 from collections import deque
 
+import frontier_search
+from solver_hooks import resolve_hooks
+
 def is_valid_state(M_left, C_left, M_right, C_right, M_total, C_total):
     """
     Check if the current distribution of missionaries and cannibals is valid.
@@ -53,20 +56,26 @@ def get_next_states(state, M_total, C_total, boat_capacity):
     
     return moves
 
-def bfs(M_total, C_total, start_state, goal_state, boat_capacity):
+def bfs(M_total, C_total, start_state, goal_state, boat_capacity, hooks=None):
     """
     Perform a BFS search to find a path from start_state to goal_state.
     Returns:
         (path, number_of_states_traversed)
     """
+    on_expand, on_generate, on_duplicate, on_layer_complete = resolve_hooks(hooks)
     queue = deque([start_state])
     visited = set([start_state])
     parent = {start_state: None}
     num_traversed = 0  # count how many states we have processed (popped from queue)
+    depth = 0
+    layer_left = 1  # states of the current depth still in the queue
+    next_layer = 0
 
     while queue:
         current_state = queue.popleft()
         num_traversed += 1 
+        if on_expand is not None:
+            on_expand(current_state, depth)
 
         if current_state == goal_state:
             # Reconstruct the path
@@ -82,13 +91,30 @@ def bfs(M_total, C_total, start_state, goal_state, boat_capacity):
                 visited.add(nxt)
                 parent[nxt] = current_state
                 queue.append(nxt)
+                next_layer += 1
+                if on_generate is not None:
+                    on_generate(current_state, nxt, depth)
+            elif on_duplicate is not None:
+                on_duplicate(current_state, nxt, depth)
+
+        layer_left -= 1
+        if layer_left == 0:
+            if on_layer_complete is not None:
+                on_layer_complete(depth, next_layer)
+            depth += 1
+            layer_left, next_layer = next_layer, 0
 
     return None, num_traversed
 
 def solve_missionaries_cannibals(M_total=3, C_total=3, boat_capacity=2, 
-                                M_left=None, C_left=None, M_right=None, C_right=None, boat_position='left'):
+                                M_left=None, C_left=None, M_right=None, C_right=None, boat_position='left',
+                                memory_lean=False, hooks=None):
     """
     Solve the missionaries and cannibals problem using BFS.
+    With memory_lean=True, a frontier-only divide-and-conquer BFS is used instead:
+    it finds a plan of the same optimal length without keeping a parent map.
+    hooks is an optional instrumentation object (see solver_hooks.py); it is not
+    called by the memory-lean search.
     
     Returns:
       {
@@ -109,7 +135,11 @@ def solve_missionaries_cannibals(M_total=3, C_total=3, boat_capacity=2,
     start_state = (M_left, C_left, M_right, C_right, boat_position)
     goal_state = (0, 0, M_total, C_total, 'right')
     
-    solution_path, num_traversed = bfs(M_total, C_total, start_state, goal_state, boat_capacity)
+    if memory_lean:
+        solution_path, num_traversed = frontier_search.divide_and_conquer_bfs(
+            start_state, goal_state, lambda state: get_next_states(state, M_total, C_total, boat_capacity))
+    else:
+        solution_path, num_traversed = bfs(M_total, C_total, start_state, goal_state, boat_capacity, hooks)
     if solution_path is None:
         print("No solution found.")
         return {"output": None, "number_of_states": num_traversed, "N": M_total}
@@ -1,5 +1,8 @@
 from collections import deque
 
+import approximate_visited
+from solver_hooks import resolve_hooks
+
 def is_valid_state(M_left, C_left, M_right, C_right, M_total, C_total):
     """
     Check if the current distribution of missionaries and cannibals is valid.
@@ -48,42 +51,58 @@ def get_next_states(state, M_total, C_total, boat_capacity):
                         moves.append((new_M_left, new_C_left, new_M_right, new_C_right, 'left'))
     return moves
 
-def dfs(M_total, C_total, start_state, goal_state, boat_capacity):
+def dfs(M_total, C_total, start_state, goal_state, boat_capacity, hooks=None, visited=None):
     """
     Perform a DFS search to find a path from start_state to goal_state.
+    visited may be an approximate visited set (see approximate_visited.py).
+    Every stack entry links to its parent's entry, so only the paths to states
+    still on the stack are kept, not a parent map of every state seen.
     Returns:
         (path, number_of_states_traversed)
     """
-    stack = [start_state]
-    visited = set([start_state])
-    parent = {start_state: None}
+    on_expand, on_generate, on_duplicate, _ = resolve_hooks(hooks)
+    # (state, depth, (state, parent link))
+    stack = [(start_state, 0, (start_state, None))]
+    if visited is None:
+        visited = set()
+    visited.add(start_state)
     num_traversed = 0
 
     while stack:
-        current_state = stack.pop()
+        current_state, depth, link = stack.pop()
         num_traversed += 1 
+        if on_expand is not None:
+            on_expand(current_state, depth)
 
         if current_state == goal_state:
             # Reconstruct the path
             path = []
-            while current_state is not None:
-                path.append(current_state)
-                current_state = parent[current_state]
+            while link is not None:
+                path.append(link[0])
+                link = link[1]
             path.reverse()
             return path, num_traversed
         
         for nxt in get_next_states(current_state, M_total, C_total, boat_capacity):
             if nxt not in visited:
                 visited.add(nxt)
-                parent[nxt] = current_state
-                stack.append(nxt)
+                stack.append((nxt, depth + 1, (nxt, link)))
+                if on_generate is not None:
+                    on_generate(current_state, nxt, depth)
+            elif on_duplicate is not None:
+                on_duplicate(current_state, nxt, depth)
 
     return None, num_traversed
 
 def solve_missionaries_cannibals(M_total=3, C_total=3, boat_capacity=2, 
-                                M_left=None, C_left=None, M_right=None, C_right=None, boat_position='left'):
+                                M_left=None, C_left=None, M_right=None, C_right=None, boat_position='left',
+                                hooks=None, visited_memory=None, false_positive_rate=0.01):
     """
     Solve the missionaries and cannibals problem using DFS.
+    hooks is an optional instrumentation object (see solver_hooks.py).
+    With visited_memory (in bytes), visited states are kept in a Bloom filter
+    of that size instead of a set (see approximate_visited.py). The search may
+    then miss a plan, and the result also reports "estimated_false_prunes".
     
     Returns:
       {
@@ -104,10 +123,12 @@ def solve_missionaries_cannibals(M_total=3, C_total=3, boat_capacity=2,
     start_state = (M_left, C_left, M_right, C_right, boat_position)
     goal_state = (0, 0, M_total, C_total, 'right')
     
-    solution_path, num_traversed = dfs(M_total, C_total, start_state, goal_state, boat_capacity)
+    visited = approximate_visited.visited_set(visited_memory, false_positive_rate)
+    solution_path, num_traversed = dfs(M_total, C_total, start_state, goal_state, boat_capacity, hooks, visited)
+    extra = {} if visited_memory is None else {"estimated_false_prunes": visited.stats()["estimated_false_prunes"]}
     if solution_path is None:
         print("No solution found.")
-        return {"output": None, "number_of_states": num_traversed, "N": M_total}
+        return dict({"output": None, "number_of_states": num_traversed, "N": M_total}, **extra)
     
     output = {}
     for i, (Ml, Cl, Mr, Cr, bp) in enumerate(solution_path):
@@ -118,7 +139,7 @@ def solve_missionaries_cannibals(M_total=3, C_total=3, boat_capacity=2,
             'C_right': Cr,
             'boat_position': bp
         }
-    return {"output": output, "number_of_states": num_traversed, "N": M_total}
+    return dict({"output": output, "number_of_states": num_traversed, "N": M_total}, **extra)
 
 if __name__ == "__main__":
     M_total = 3
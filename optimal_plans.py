@@ -0,0 +1,166 @@
+import random
+
+import jealous_husbands_bfs
+import missionary_cannibal_solver_bfs
+
+
+def build_optimal_plan_dag(start, goal, successors):
+    """
+    Build the DAG of all shortest plans from start to goal.
+
+    A layered BFS runs until the goal's layer is reached, then a backward scan
+    keeps only the states that lie on some shortest path. Moves in both puzzles
+    are reversible, so a new layer only has to be checked against the previous
+    and current layers.
+
+    Returns None if the goal is unreachable, otherwise a dictionary:
+        "start", "goal": the endpoints
+        "length": number of moves in an optimal plan
+        "children": state -> list of successors on the next optimal layer
+        "counts": state -> number of optimal plans from that state to the goal
+    """
+    layers = [{start}]
+    previous = set()
+    while goal not in layers[-1]:
+        current = layers[-1]
+        next_layer = set()
+        for state in current:
+            for nxt in successors(state):
+                if nxt not in previous and nxt not in current:
+                    next_layer.add(nxt)
+        if not next_layer:
+            return None
+        previous = current
+        layers.append(next_layer)
+
+    # Backward scan: keep only states with a successor on the next optimal layer
+    children = {goal: []}
+    counts = {goal: 1}
+    on_path = {goal}
+    for depth in range(len(layers) - 2, -1, -1):
+        kept = set()
+        for state in layers[depth]:
+            nxt_states = [nxt for nxt in successors(state) if nxt in on_path]
+            if nxt_states:
+                children[state] = nxt_states
+                counts[state] = sum(counts[nxt] for nxt in nxt_states)
+                kept.add(state)
+        layers[depth + 1] = None
+        on_path = kept
+
+    return {
+        "start": start,
+        "goal": goal,
+        "length": len(layers) - 1,
+        "children": children,
+        "counts": counts
+    }
+
+def count_optimal_plans(dag):
+    """
+    Number of distinct optimal plans in the DAG (an exact, arbitrarily large int).
+    """
+    if dag is None:
+        return 0
+    return dag["counts"][dag["start"]]
+
+def iter_optimal_plans(dag):
+    """
+    Lazily yield every optimal plan as a list of states, one at a time.
+    Only the current plan and one iterator per depth are kept in memory.
+    """
+    if dag is None:
+        return
+    children = dag["children"]
+    path = [dag["start"]]
+    stack = [iter(children[dag["start"]])]
+    if dag["start"] == dag["goal"]:
+        yield list(path)
+        return
+    while stack:
+        nxt = next(stack[-1], None)
+        if nxt is None:
+            stack.pop()
+            path.pop()
+            continue
+        path.append(nxt)
+        if nxt == dag["goal"]:
+            yield list(path)
+            path.pop()
+        else:
+            stack.append(iter(children[nxt]))
+
+def sample_optimal_plans(dag, k=1, seed=None):
+    """
+    Draw k optimal plans uniformly at random (with replacement).
+    Each step picks a successor with probability proportional to the number of
+    optimal plans through it, so every plan is equally likely.
+    """
+    if dag is None:
+        return []
+    rng = random.Random(seed)
+    children = dag["children"]
+    counts = dag["counts"]
+    plans = []
+    for _ in range(k):
+        state = dag["start"]
+        plan = [state]
+        while state != dag["goal"]:
+            pick = rng.randrange(counts[state])
+            for nxt in children[state]:
+                if pick < counts[nxt]:
+                    state = nxt
+                    break
+                pick -= counts[nxt]
+            plan.append(state)
+        plans.append(plan)
+    return plans
+
+def jealous_husbands_plan_dag(N=3, boat_capacity=2, left=None, right=None, boat_pos='L'):
+    """
+    Optimal plan DAG for the Jealous Husbands problem, using the same start
+    state conventions as jealous_husbands_bfs.solve_jealous_husbands.
+    """
+    if left is None:
+        left = frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)])
+    else:
+        left = frozenset(tuple(p) for p in left)
+    if right is None:
+        right = frozenset()
+    else:
+        right = frozenset(tuple(p) for p in right)
+
+    start = (left, right, boat_pos)
+    goal = (frozenset(), frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)]), 'R')
+    return build_optimal_plan_dag(start, goal, lambda state: jealous_husbands_bfs.generate_moves(state, N, boat_capacity))
+
+def missionary_cannibal_plan_dag(M_total=3, C_total=3, boat_capacity=2,
+                                 M_left=None, C_left=None, M_right=None, C_right=None, boat_position='left'):
+    """
+    Optimal plan DAG for the Missionaries and Cannibals problem, using the same
+    start state conventions as missionary_cannibal_solver_bfs.solve_missionaries_cannibals.
+    """
+    if M_left is None:
+        M_left = M_total
+    if C_left is None:
+        C_left = C_total
+    if M_right is None:
+        M_right = 0
+    if C_right is None:
+        C_right = 0
+
+    start_state = (M_left, C_left, M_right, C_right, boat_position)
+    goal_state = (0, 0, M_total, C_total, 'right')
+    return build_optimal_plan_dag(start_state, goal_state,
+                                  lambda state: missionary_cannibal_solver_bfs.get_next_states(state, M_total, C_total, boat_capacity))
+
+
+if __name__ == "__main__":
+    for N, boat_capacity in [(3, 2), (5, 3), (6, 4)]:
+        dag = jealous_husbands_plan_dag(N=N, boat_capacity=boat_capacity)
+        print("Jealous husbands N=%d, capacity=%d: %d optimal plans of length %d"
+              % (N, boat_capacity, count_optimal_plans(dag), dag["length"]))
+    dag = missionary_cannibal_plan_dag(M_total=3, C_total=3, boat_capacity=2)
+    print("Missionaries and cannibals 3/3, capacity 2: %d optimal plans" % count_optimal_plans(dag))
+    for plan in iter_optimal_plans(dag):
+        print(plan)
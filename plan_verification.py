@@ -0,0 +1,167 @@
+from collections import OrderedDict
+
+import instances
+import jealous_husbands_bfs
+import missionary_cannibal_solver_bfs
+
+MAX_CACHED_OPTIMA = 10000
+
+# Normalized instance key -> length (number of moves) of an optimal plan
+_optimal_lengths = OrderedDict()
+
+
+def record_optimal_length(instance, length):
+    """
+    Remember the optimal plan length for an instance key (see instances.py).
+    Only lengths produced by an optimal solver (BFS) should be recorded.
+    """
+    _optimal_lengths[instance] = length
+    _optimal_lengths.move_to_end(instance)
+    if len(_optimal_lengths) > MAX_CACHED_OPTIMA:
+        _optimal_lengths.popitem(last=False)
+
+def known_optimal_length(instance):
+    """
+    Cached optimal plan length for an instance key, or None if unknown.
+    """
+    return _optimal_lengths.get(instance)
+
+def _ordered_stages(plan):
+    """
+    Accept either a list of stages or the solvers' {"0": stage, "1": stage, ...} output.
+    """
+    if isinstance(plan, dict):
+        keys = sorted(plan, key=int)
+        if [int(k) for k in keys] != list(range(len(keys))):
+            raise ValueError("plan steps must be numbered 0..n-1")
+        return [plan[k] for k in keys]
+    return list(plan)
+
+def _result(stages, first_invalid_step, reason, reaches_goal, instance):
+    optimal_length = known_optimal_length(instance) if instance is not None else None
+    valid = first_invalid_step is None
+    length = len(stages) - 1
+    return {
+        "valid": valid,
+        "first_invalid_step": first_invalid_step,
+        "reason": reason,
+        "reaches_goal": reaches_goal,
+        "length": length,
+        "optimal_length": optimal_length,
+        "is_optimal": (valid and reaches_goal and length == optimal_length) if optimal_length is not None else None
+    }
+
+def verify_jealous_husbands_plan(N, boat_capacity, plan):
+    """
+    Check a Jealous Husbands plan step by step in O(steps) without searching.
+
+    plan is a list of stages (or the solvers' output dictionary), each stage being
+    {"left_bank": [...], "right_bank": [...], "boat_position": "L" | "R"}.
+
+    Returns a dictionary with "valid", "first_invalid_step", "reason",
+    "reaches_goal", "length", "optimal_length" (if cached) and "is_optimal".
+    """
+    try:
+        stages = _ordered_stages(plan)
+    except (TypeError, ValueError):
+        return _result([], 0, "malformed_plan", False, None)
+    if not stages:
+        return _result(stages, 0, "empty_plan", False, None)
+
+    everyone = frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)])
+    goal = (frozenset(), everyone, 'R')
+
+    states = []
+    for step, stage in enumerate(stages):
+        try:
+            left = frozenset(tuple(p) for p in stage["left_bank"])
+            right = frozenset(tuple(p) for p in stage["right_bank"])
+            boat_pos = stage["boat_position"]
+        except (KeyError, TypeError):
+            return _result(stages, step, "malformed_stage", False, None)
+        if boat_pos not in ('L', 'R') or left & right or left | right != everyone:
+            return _result(stages, step, "malformed_stage", False, None)
+        states.append((left, right, boat_pos))
+
+    instance = instances.jealous_husband_key(N, boat_capacity, states[0][0], states[0][1], states[0][2])
+    if not jealous_husbands_bfs.is_valid_state(states[0][0], states[0][1]):
+        return _result(stages, 0, "constraint_violated", False, instance)
+
+    for step in range(1, len(states)):
+        prev_left, prev_right, prev_boat = states[step - 1]
+        left, right, boat_pos = states[step]
+        if boat_pos == prev_boat:
+            return _result(stages, step, "boat_not_moved", False, instance)
+        # People who crossed must all come from the bank the boat left
+        if prev_boat == 'L':
+            moved = prev_left - left
+            ok = left <= prev_left
+        else:
+            moved = prev_right - right
+            ok = right <= prev_right
+        if not ok:
+            return _result(stages, step, "people_not_on_boat_side", False, instance)
+        if not moved:
+            return _result(stages, step, "empty_boat", False, instance)
+        if len(moved) > boat_capacity:
+            return _result(stages, step, "over_capacity", False, instance)
+        if not jealous_husbands_bfs.is_valid_state(left, right):
+            return _result(stages, step, "constraint_violated", False, instance)
+
+    return _result(stages, None, None, states[-1] == goal, instance)
+
+def verify_missionary_cannibal_plan(M_total, C_total, boat_capacity, plan):
+    """
+    Check a Missionaries and Cannibals plan step by step in O(steps) without searching.
+
+    plan is a list of stages (or the solvers' output dictionary), each stage being
+    {"M_left", "C_left", "M_right", "C_right", "boat_position": "left" | "right"}.
+
+    Returns the same dictionary as verify_jealous_husbands_plan.
+    """
+    try:
+        stages = _ordered_stages(plan)
+    except (TypeError, ValueError):
+        return _result([], 0, "malformed_plan", False, None)
+    if not stages:
+        return _result(stages, 0, "empty_plan", False, None)
+
+    goal = (0, 0, M_total, C_total, 'right')
+
+    states = []
+    for step, stage in enumerate(stages):
+        try:
+            state = (stage["M_left"], stage["C_left"], stage["M_right"], stage["C_right"], stage["boat_position"])
+        except (KeyError, TypeError):
+            return _result(stages, step, "malformed_stage", False, None)
+        Ml, Cl, Mr, Cr, bp = state
+        # Counts come from the client: "3", 3.0 or true are not counts
+        if any(type(count) is not int for count in (Ml, Cl, Mr, Cr)):
+            return _result(stages, step, "malformed_stage", False, None)
+        if bp not in ('left', 'right') or Ml + Mr != M_total or Cl + Cr != C_total:
+            return _result(stages, step, "malformed_stage", False, None)
+        states.append(state)
+
+    instance = instances.missionary_cannibal_key(M_total, C_total, boat_capacity, *states[0])
+    if not missionary_cannibal_solver_bfs.is_valid_state(*states[0][:4], M_total, C_total):
+        return _result(stages, 0, "constraint_violated", False, instance)
+
+    for step in range(1, len(states)):
+        prev_Ml, prev_Cl, _, _, prev_bp = states[step - 1]
+        Ml, Cl, Mr, Cr, bp = states[step]
+        if bp == prev_bp:
+            return _result(stages, step, "boat_not_moved", False, instance)
+        if prev_bp == 'left':
+            M_move, C_move = prev_Ml - Ml, prev_Cl - Cl
+        else:
+            M_move, C_move = Ml - prev_Ml, Cl - prev_Cl
+        if M_move < 0 or C_move < 0:
+            return _result(stages, step, "people_not_on_boat_side", False, instance)
+        if M_move + C_move == 0:
+            return _result(stages, step, "empty_boat", False, instance)
+        if M_move + C_move > boat_capacity:
+            return _result(stages, step, "over_capacity", False, instance)
+        if not missionary_cannibal_solver_bfs.is_valid_state(Ml, Cl, Mr, Cr, M_total, C_total):
+            return _result(stages, step, "constraint_violated", False, instance)
+
+    return _result(stages, None, None, states[-1] == goal, instance)
@@ -0,0 +1,218 @@
+"""
+Incremental re-planning for interactive play.
+
+Every move can be undone, so a breadth-first search run backwards from the
+goal labels each state it reaches with its distance to the goal and with the
+next state on a shortest plan towards it. That data does not depend on where
+the player starts. A GoalDistances object runs this search lazily and keeps
+it. It only continues the search, layer by layer, when asked about a state it
+has not labeled yet. All work done for earlier stages is reused.
+
+A PlanningSession follows one player through a GoalDistances object.
+Following the plan, and any deviation to an already labeled state, costs one
+dictionary lookup per move. A deviation to an unlabeled state resumes the
+backward search only until that state is reached.
+
+GoalDistances objects are shared between request threads. The search runs
+under a lock. Labels are never changed once written, and a state's next hop
+is written before its distance, so lookups of labeled states need no lock.
+"""
+from collections import OrderedDict, deque
+import threading
+import uuid
+
+import feasibility
+import jealous_husbands_bfs
+import missionary_cannibal_solver_bfs
+
+MAX_SESSIONS = 1000
+MAX_SHARED_DISTANCES = 64
+
+
+class GoalDistances:
+    """
+    Resumable backward BFS from goal over an undirected state graph.
+    """
+
+    def __init__(self, puzzle, size, boat_capacity, goal, successors):
+        self.puzzle = puzzle
+        self.size = size
+        self.boat_capacity = boat_capacity
+        self.goal = goal
+        self.successors = successors
+        self.distance = {goal: 0}
+        self.next_hop = {goal: None}
+        self.queue = deque([goal])
+        self.expanded = 0
+        self.lock = threading.Lock()
+
+    def search_until(self, state):
+        """
+        Continue the search until state is labeled or the goal's component is
+        exhausted. Returns the number of states expanded by this call.
+        """
+        if state in self.distance:
+            return 0
+        expanded = 0
+        with self.lock:
+            while state not in self.distance and self.queue:
+                current = self.queue.popleft()
+                expanded += 1
+                for nxt in self.successors(current):
+                    if nxt not in self.distance:
+                        # next_hop first: a state counts as labeled once it has a distance
+                        self.next_hop[nxt] = current
+                        self.distance[nxt] = self.distance[current] + 1
+                        self.queue.append(nxt)
+            self.expanded += expanded
+        return expanded
+
+    def plan(self, state):
+        """
+        Shortest plan from state to the goal as a list of states, or None if
+        the goal cannot be reached. Returns (plan, states expanded for it).
+        """
+        expanded = self.search_until(state)
+        if state not in self.distance:
+            return None, expanded
+        plan = [state]
+        while plan[-1] != self.goal:
+            plan.append(self.next_hop[plan[-1]])
+        return plan, expanded
+
+class PlanningSession:
+    """
+    One player's progress through a puzzle instance.
+    """
+
+    def __init__(self, distances):
+        self.distances = distances
+        self.state = None
+        self.replans = 0
+        self.moves_followed = 0
+        self.lock = threading.Lock()
+
+    def update(self, state):
+        """
+        Record the player's current state. Returns (next_state, expanded):
+        the next state on a shortest plan from state (None at the goal or if
+        the goal is unreachable) and how many states had to be expanded.
+        """
+        with self.lock:
+            expected = self.distances.next_hop.get(self.state) if self.state is not None else None
+            if expected is not None and state == expected:
+                self.moves_followed += 1
+                expanded = 0
+            else:
+                self.replans += 1
+                expanded = self.distances.search_until(state)
+            self.state = state
+        return self.distances.next_hop.get(state), expanded
+
+    def remaining_plan(self):
+        """
+        The rest of the plan from the current state, None if there is none.
+        """
+        plan, _ = self.distances.plan(self.state)
+        return plan
+
+# Goal-distance data is shared by all sessions for the same puzzle, size and boat
+_distances = OrderedDict()
+_sessions = OrderedDict()
+_lru_lock = threading.Lock()
+
+
+def _shared_distances(puzzle, size, boat_capacity, goal, successors):
+    key = (puzzle, size, boat_capacity)
+    with _lru_lock:
+        distances = _distances.get(key)
+        if distances is None:
+            distances = _distances[key] = GoalDistances(puzzle, size, boat_capacity, goal, successors)
+        _distances.move_to_end(key)
+        if len(_distances) > MAX_SHARED_DISTANCES:
+            _distances.popitem(last=False)
+    return distances
+
+def jealous_husbands_distances(N, boat_capacity):
+    everyone = frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)])
+    return _shared_distances("jealous-husband", N, boat_capacity, (frozenset(), everyone, 'R'),
+                             lambda state: jealous_husbands_bfs.generate_moves(state, N, boat_capacity))
+
+def missionary_cannibal_distances(M_total, C_total, boat_capacity):
+    return _shared_distances("missionary-cannibal", (M_total, C_total), boat_capacity, (0, 0, M_total, C_total, 'right'),
+                             lambda state: missionary_cannibal_solver_bfs.get_next_states(state, M_total, C_total, boat_capacity))
+
+def create_session(distances):
+    """
+    Start a session on distances; returns (session_id, session). The least
+    recently used session is dropped once there are more than MAX_SESSIONS.
+    """
+    session_id = uuid.uuid4().hex
+    session = PlanningSession(distances)
+    with _lru_lock:
+        _sessions[session_id] = session
+        if len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+    return session_id, session
+
+def get_session(session_id):
+    with _lru_lock:
+        session = _sessions.get(session_id)
+        if session is not None:
+            _sessions.move_to_end(session_id)
+    return session
+
+def _format_state(puzzle, state):
+    if puzzle == "jealous-husband":
+        l, r, bp = state
+        return {'left_bank': sorted(list(l)), 'right_bank': sorted(list(r)), 'boat_position': bp}
+    Ml, Cl, Mr, Cr, bp = state
+    return {'M_left': Ml, 'C_left': Cl, 'M_right': Mr, 'C_right': Cr, 'boat_position': bp}
+
+def move(session, parameters, full_plan=False):
+    """
+    Handle one request of a session. parameters holds the player's current
+    state in the same fields as the puzzle's endpoint ("stage" for Jealous
+    Husbands, M_left/C_left/M_right/C_right/boat_position for Missionaries
+    and Cannibals).
+
+    Returns "next" (the next stage, None at the goal), "distance" (moves
+    left), "replanned" (False when the player followed the plan), "N" and
+    "number_of_states", which counts only the states expanded for this request.
+    With full_plan, "output" also holds the rest of the plan in the regular
+    solver format, which costs time proportional to its length.
+    """
+    distances = session.distances
+    if distances.puzzle == "jealous-husband":
+        N = distances.size
+        stage = parameters["stage"]
+        state = (frozenset(tuple(p) for p in stage["left_bank"]), frozenset(tuple(p) for p in stage["right_bank"]),
+                 stage["boat_position"])
+        check = lambda: feasibility.jealous_husbands_feasibility(N, distances.boat_capacity, *state)
+    else:
+        N = distances.size[0]
+        state = (parameters["M_left"], parameters["C_left"], parameters["M_right"], parameters["C_right"],
+                 parameters["boat_position"])
+        check = lambda: feasibility.missionary_cannibal_feasibility(*distances.size, distances.boat_capacity, *state)
+
+    # Only states the search has not labeled yet can be malformed or unreachable
+    if state not in distances.distance:
+        result = check()
+        if not result["solvable"]:
+            session.state = None
+            return {"output": None, "number_of_states": 0, "N": N, "next": None, "replanned": True,
+                    "reason": result["reason"]}
+
+    followed = session.moves_followed
+    next_state, expanded = session.update(state)
+    result = {
+        "number_of_states": expanded,
+        "N": N,
+        "next": None if next_state is None else _format_state(distances.puzzle, next_state),
+        "distance": distances.distance[state],
+        "replanned": session.moves_followed == followed
+    }
+    if full_plan:
+        plan = session.remaining_plan()
+        result["output"] = {str(i): _format_state(distances.puzzle, s) for i, s in enumerate(plan)}
+    return result
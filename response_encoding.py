@@ -0,0 +1,116 @@
+import hashlib
+import json
+import zlib
+
+from flask import Response, request
+
+# Bodies smaller than this are sent as they are; compressing them costs more than it saves
+COMPRESSION_MIN_SIZE = 1024
+# Bodies larger than this are encoded and compressed chunk by chunk while being sent
+STREAMING_MIN_SIZE = 256 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# zlib window bits selecting the container of each content coding
+ENCODINGS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+# Bump when the response format changes so cached ETags stop matching
+RESPONSE_VERSION = 1
+
+
+def negotiate_encoding():
+    """
+    Best content coding the client accepts, or None for identity.
+    """
+    return request.accept_encodings.best_match(list(ENCODINGS))
+
+def instance_etag(instance, solver):
+    """
+    Strong ETag for the response to a normalized instance (see instances.py)
+    solved by a deterministic solver. The negotiated content coding is part of
+    the tag, since each coding is a different representation.
+    """
+    key = repr((RESPONSE_VERSION, instance, solver, negotiate_encoding()))
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+def etag_matches(etag):
+    """
+    True if the client already holds the representation tagged etag.
+    """
+    return etag is not None and etag in request.if_none_match
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    return response
+
+def _compressed_chunks(chunks, encoding):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, ENCODINGS[encoding])
+    buffered = []
+    size = 0
+    for chunk in chunks:
+        buffered.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_CHUNK_SIZE:
+            data = compressor.compress("".join(buffered).encode())
+            buffered, size = [], 0
+            if data:
+                yield data
+    data = compressor.compress("".join(buffered).encode()) + compressor.flush()
+    if data:
+        yield data
+
+def _plain_chunks(chunks):
+    buffered = []
+    size = 0
+    for chunk in chunks:
+        buffered.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_CHUNK_SIZE:
+            yield "".join(buffered).encode()
+            buffered, size = [], 0
+    if buffered:
+        yield "".join(buffered).encode()
+
+def json_response(payload, etag=None):
+    """
+    Serialize payload as JSON (same text as json.dumps), compressed with the
+    negotiated content coding when it is large enough. Large payloads are
+    encoded, compressed and sent incrementally instead of being built in memory.
+    """
+    chunks = json.JSONEncoder().iterencode(payload)
+    head = []
+    size = 0
+    streaming = False
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= STREAMING_MIN_SIZE:
+            streaming = True
+            break
+
+    encoding = negotiate_encoding()
+    if streaming:
+        def all_chunks():
+            yield from head
+            yield from chunks
+        if encoding is not None:
+            body = _compressed_chunks(all_chunks(), encoding)
+        else:
+            body = _plain_chunks(all_chunks())
+        response = Response(body, mimetype="application/json")
+    else:
+        body = "".join(head).encode()
+        if len(body) < COMPRESSION_MIN_SIZE:
+            encoding = None
+        if encoding is not None:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, ENCODINGS[encoding])
+            body = compressor.compress(body) + compressor.flush()
+        response = Response(body, mimetype="application/json")
+
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    if etag is not None:
+        response.set_etag(etag)
+    return response
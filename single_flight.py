@@ -0,0 +1,223 @@
+"""
+Single-flight coalescing of identical concurrent solves.
+
+While a solve for a key is in flight, other callers with the same key wait
+for its result instead of starting their own. Inside a process, waiters
+block on an event. Across worker processes on the same host, the leader holds
+an exclusive flock on <directory>/<key>.lock and publishes the result as
+<directory>/<key>.json. Other processes poll for that file. If the leader
+dies, its lock is released and a waiter takes over. If the wait times out,
+the waiter solves on its own. Where flock is unavailable (Windows), only
+calls inside one process are coalesced.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): coalesce inside this process only
+    fcntl = None
+
+
+class SingleFlight:
+    """
+    Coalesces calls by key. timeout bounds how long a waiter waits for a
+    leader. Only results of solves in flight while a call waits are shared;
+    nothing is cached.
+    """
+
+    def __init__(self, directory=None, timeout=30.0, poll_interval=0.01, cleanup_age=3600.0):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "river-crossing-single-flight")
+        os.makedirs(self.directory, exist_ok=True)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.cleanup_age = cleanup_age
+        self._last_cleanup = time.monotonic()
+        self._lock = threading.Lock()
+        self._in_flight = {}   # key digest -> (event, holder of the result)
+        self.counters = {"leader": 0, "coalesced_in_process": 0, "coalesced_across_processes": 0,
+                         "timeouts": 0, "leader_failures": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["in_flight"] = len(self._in_flight)
+        stats["coalesced"] = stats["coalesced_in_process"] + stats["coalesced_across_processes"]
+        return stats
+
+    def do(self, key, solve):
+        """
+        Return solve()'s result for key, sharing it with identical concurrent
+        calls. solve() must return something JSON-serializable. Returns
+        (result, shared) where shared is True if another call computed it.
+        """
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        with self._lock:
+            flight = self._in_flight.get(digest)
+            leader = flight is None
+            if leader:
+                flight = (threading.Event(), {})
+                self._in_flight[digest] = flight
+        event, holder = flight
+
+        if not leader:
+            if event.wait(self.timeout) and "result" in holder:
+                self._count("coalesced_in_process")
+                return holder["result"], True
+            if not event.is_set():
+                self._count("timeouts")
+            else:
+                self._count("leader_failures")
+            return solve(), False
+
+        try:
+            result, shared = self._lead(digest, solve)
+            holder["result"] = result
+            return result, shared
+        finally:
+            with self._lock:
+                del self._in_flight[digest]
+            event.set()
+
+    def _lead(self, digest, solve):
+        """
+        Solve as this process's leader for digest, or wait for another process's
+        leader that holds the file lock.
+
+        A leader writes a fresh token into the lock file and publishes its
+        result with that token. A waiter only accepts a result whose token it
+        read while the lock was held, so results of earlier solves are never
+        served. The leader unlinks the lock file before releasing it; a waiter
+        that then gets the lock on the unlinked file opens the path again.
+        """
+        if fcntl is None:
+            self._count("leader")
+            return solve(), False
+        lock_path = os.path.join(self.directory, digest + ".lock")
+        result_path = os.path.join(self.directory, digest + ".json")
+        deadline = time.monotonic() + self.timeout
+        seen = set()   # tokens of leaders that were solving while we waited
+
+        while True:
+            with open(lock_path, "a+") as lock_file:
+                while True:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        pass
+                    lock_file.seek(0)
+                    token = lock_file.read()
+                    if token:
+                        seen.add(token)
+                    result = self._read_result(result_path, seen)
+                    if result is not None:
+                        self._count("coalesced_across_processes")
+                        return result, True
+                    if time.monotonic() >= deadline:
+                        self._count("timeouts")
+                        return solve(), False
+                    time.sleep(self.poll_interval)
+
+                try:
+                    # The leader we waited for may have finished just before we got the lock
+                    result = self._read_result(result_path, seen)
+                    if result is not None:
+                        self._count("coalesced_across_processes")
+                        return result, True
+                    if not _same_file(lock_file, lock_path):
+                        # Unlinked by its last holder; lock whatever is at the path now
+                        continue
+                    token = os.urandom(16).hex()
+                    lock_file.truncate(0)
+                    lock_file.write(token)
+                    lock_file.flush()
+                    try:
+                        self._count("leader")
+                        result = solve()
+                        self._write_result(result_path, token, result)
+                    finally:
+                        lock_file.truncate(0)
+                        os.remove(lock_path)
+                    self._cleanup()
+                    return result, False
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_result(self, path, tokens):
+        """
+        The result published by one of the leaders whose tokens we saw, or None.
+        """
+        if not tokens:
+            return None
+        try:
+            with open(path) as f:
+                published = json.load(f)
+            if published["token"] not in tokens:
+                return None
+            return published["result"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_result(self, path, token, result):
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump({"token": token, "result": result}, f)
+        os.replace(tmp_path, path)
+
+    def _cleanup(self):
+        """
+        Now and then, delete result files and free lock files nobody has touched
+        for cleanup_age seconds. Lock files of leaders that died are removed
+        under the lock, like a leader removes its own.
+        """
+        if time.monotonic() - self._last_cleanup < self.cleanup_age / 10:
+            return
+        self._last_cleanup = time.monotonic()
+        cutoff = time.time() - self.cleanup_age
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                if name.endswith(".lock"):
+                    _remove_free_lock(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                pass
+
+def _same_file(f, path):
+    """
+    Whether the open file f is still the file at path.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    opened = os.fstat(f.fileno())
+    return (st.st_dev, st.st_ino) == (opened.st_dev, opened.st_ino)
+
+def _remove_free_lock(path):
+    """
+    Unlink the lock file at path unless someone holds it.
+    """
+    with open(path, "r") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        try:
+            if _same_file(lock_file, path):
+                os.remove(path)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
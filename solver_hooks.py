@@ -0,0 +1,171 @@
+"""
+Instrumentation hooks for the solvers.
+
+Every solve_* function accepts hooks=None. A hooks object may define any of:
+
+    on_expand(state, depth)                 a state is taken off the open list and expanded
+    on_generate(state, child, depth)        expanding state (at depth) produced a child not seen before
+    on_duplicate(state, child, depth)       expanding state (at depth) produced an already seen child
+    on_layer_complete(depth, frontier)      BFS finished a depth (A*: an f value), frontier = size of the next one
+
+depth is the expanding state's depth: its distance from the start along the
+search tree (A*: its g value).
+
+Missing methods are simply not called, and with hooks=None the solvers only
+pay for a None check per event.
+"""
+from contextlib import contextmanager
+import json
+import time
+
+HOOK_NAMES = ("on_expand", "on_generate", "on_duplicate", "on_layer_complete")
+
+
+def resolve_hooks(hooks):
+    """
+    Look the hook methods up once: returns (on_expand, on_generate, on_duplicate,
+    on_layer_complete), each either a callable or None.
+    """
+    if hooks is None:
+        return (None, None, None, None)
+    return tuple(getattr(hooks, name, None) for name in HOOK_NAMES)
+
+class SamplingTracer:
+    """
+    Hooks object that records what a search is doing.
+
+    Counts (expanded, generated and duplicate states per depth, frontier sizes)
+    are exact. Timings are sampled: every sample_every-th expansion is timed
+    until the next event, and while a sample is open, calls to the solver
+    module's is_valid_state are timed too (see instrument()), which splits the
+    expansion time into move generation and validation.
+
+        tracer = SamplingTracer(sample_every=10)
+        with tracer.instrument(jealous_husbands_bfs):
+            jealous_husbands_bfs.solve_jealous_husbands(N=6, boat_capacity=4, hooks=tracer)
+        tracer.write("bfs_n6.trace")
+    """
+
+    def __init__(self, sample_every=1):
+        self.sample_every = max(1, int(sample_every))
+        self.depths = {}
+        self.layers = []   # (completed depth or f value, size of the next layer)
+        self.expanded = 0
+        self.sampled = 0
+        self.expand_seconds = 0.0
+        self.validation_seconds = 0.0
+        self.validation_calls = 0
+        self._sample_start = None
+
+    def _row(self, depth):
+        row = self.depths.get(depth)
+        if row is None:
+            row = self.depths[depth] = {"expanded": 0, "generated": 0, "duplicates": 0}
+        return row
+
+    def _close_sample(self):
+        if self._sample_start is not None:
+            self.expand_seconds += time.perf_counter() - self._sample_start
+            self._sample_start = None
+
+    def on_expand(self, state, depth):
+        self._close_sample()
+        self._row(depth)["expanded"] += 1
+        self.expanded += 1
+        if self.expanded % self.sample_every == 0:
+            self.sampled += 1
+            self._sample_start = time.perf_counter()
+
+    def on_generate(self, state, child, depth):
+        self._row(depth)["generated"] += 1
+
+    def on_duplicate(self, state, child, depth):
+        self._row(depth)["duplicates"] += 1
+
+    def on_layer_complete(self, depth, frontier):
+        self._close_sample()
+        self.layers.append((depth, frontier))
+
+    @contextmanager
+    def instrument(self, module):
+        """
+        Temporarily wrap module.is_valid_state so that validation time inside
+        sampled expansions is measured.
+        """
+        original = module.is_valid_state
+
+        def timed_is_valid_state(*args):
+            if self._sample_start is None:
+                return original(*args)
+            started = time.perf_counter()
+            try:
+                return original(*args)
+            finally:
+                self.validation_seconds += time.perf_counter() - started
+                self.validation_calls += 1
+
+        module.is_valid_state = timed_is_valid_state
+        try:
+            yield self
+        finally:
+            self._close_sample()
+            module.is_valid_state = original
+
+    def summary(self):
+        self._close_sample()
+        generated = sum(row["generated"] for row in self.depths.values())
+        duplicates = sum(row["duplicates"] for row in self.depths.values())
+        children = generated + duplicates
+        return {
+            "expanded": self.expanded,
+            "generated": generated,
+            "duplicates": duplicates,
+            "branching_factor": round(children / self.expanded, 4) if self.expanded else 0.0,
+            "duplicate_ratio": round(duplicates / children, 4) if children else 0.0,
+            "sample_every": self.sample_every,
+            "sampled_expansions": self.sampled,
+            "sampled_expand_seconds": round(self.expand_seconds, 6),
+            "sampled_validation_seconds": round(self.validation_seconds, 6),
+            "sampled_generation_seconds": round(max(0.0, self.expand_seconds - self.validation_seconds), 6),
+            "validation_calls": self.validation_calls
+        }
+
+    def rows(self):
+        """
+        One dictionary per depth with its counts, branching factor and
+        duplicate ratio.
+        """
+        result = []
+        for depth in sorted(self.depths):
+            row = self.depths[depth]
+            children = row["generated"] + row["duplicates"]
+            result.append({
+                "depth": depth,
+                "expanded": row["expanded"],
+                "generated": row["generated"],
+                "duplicates": row["duplicates"],
+                "branching_factor": round(children / row["expanded"], 4) if row["expanded"] else 0.0,
+                "duplicate_ratio": round(row["duplicates"] / children, 4) if children else 0.0
+            })
+        return result
+
+    def layer_rows(self):
+        """
+        One dictionary per completed layer: the depth (A*: the f value) that was
+        finished and the size of the frontier after it. These are kept apart
+        from rows(), because in A* layers are f values, not depths.
+        """
+        return [{"completed": completed, "frontier": frontier} for completed, frontier in self.layers]
+
+    def write(self, path):
+        """
+        Write the trace as JSON lines: a summary line, one line per depth and
+        one per completed layer, with sorted keys so traces of two runs can be
+        diffed line by line.
+        """
+        with open(path, "w") as f:
+            f.write(json.dumps(dict(self.summary(), kind="summary"), sort_keys=True) + "\n")
+            for row in self.rows():
+                f.write(json.dumps(dict(row, kind="depth"), sort_keys=True) + "\n")
+            for row in self.layer_rows():
+                f.write(json.dumps(dict(row, kind="layer"), sort_keys=True) + "\n")
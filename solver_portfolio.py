@@ -0,0 +1,249 @@
+"""
+Parallel solver portfolio.
+
+Runs several solver configurations on the same instance in separate processes.
+The first result that meets the requested guarantee wins, and the other
+processes are terminated. "any" accepts any configuration. "optimal" only runs
+configurations that always return a shortest plan: the BFS variants. The A*
+solvers use a heuristic that can overestimate, so they do not qualify.
+
+Every race can be appended to a JSON-lines log. Once one configuration has
+clearly won enough races for an instance class (puzzle, size, boat capacity,
+standard start or not, guarantee), recommend() names it. race() then runs
+only that configuration, and still races all of them for a small fraction
+of requests so the log keeps learning. Only full races are logged.
+"""
+from collections import Counter
+import importlib
+import json
+import multiprocessing
+from multiprocessing.connection import wait
+import os
+import random
+import threading
+import time
+
+# name -> (module, solve function, extra keyword arguments, always optimal)
+CONFIGURATIONS = {
+    "jealous-husband": {
+        "bfs": ("jealous_husbands_bfs", "solve_jealous_husbands", {}, True),
+        "bfs_vectorized": ("jealous_husbands_bfs", "solve_jealous_husbands", {"vectorized": True}, True),
+        "dfs": ("jealous_husbands_dfs", "solve_jealous_husbands", {}, False),
+        "a_star": ("jealous_husbands_a_star", "solve_jealous_husbands", {}, False),
+    },
+    "missionary-cannibal": {
+        "bfs": ("missionary_cannibal_solver_bfs", "solve_missionaries_cannibals", {}, True),
+        "dfs": ("missionary_cannibal_solver_dfs", "solve_missionaries_cannibals", {}, False),
+        "a_star": ("missionary_cannibal_a_star", "solve_missionaries_cannibals", {}, False),
+    }
+}
+GUARANTEES = ("any", "optimal")
+
+# A recommendation needs this many logged races of its class, won by one
+# configuration at least this often
+MIN_RACES = 5
+MIN_WIN_SHARE = 0.8
+# Fraction of recommended requests that are raced anyway
+EXPLORE_RATE = 0.1
+# Races running at the same time, each with up to one process per configuration
+MAX_CONCURRENT_RACES = max(1, (os.cpu_count() or 1) // 4)
+DEFAULT_TIMEOUT = 30.0
+
+_race_slots = threading.BoundedSemaphore(MAX_CONCURRENT_RACES)
+_context_lock = threading.Lock()
+_mp_context = None
+
+_log_lock = threading.Lock()
+_log_cache = {}   # log path -> (file size, Counter of (instance class, winner))
+
+
+def instance_class(puzzle, parameters):
+    """
+    The class an instance is logged under.
+    parameters are the solve keyword arguments passed to race().
+    """
+    if puzzle == "jealous-husband":
+        N = parameters["N"]
+        size = N
+        standard = parameters.get("right") in (None, []) and parameters.get("boat_pos", 'L') == 'L'
+    else:
+        size = [parameters["M_total"], parameters["C_total"]]
+        standard = (parameters.get("M_right") in (None, 0) and parameters.get("C_right") in (None, 0)
+                    and parameters.get("boat_position", 'left') == 'left')
+    return json.dumps([puzzle, size, parameters["boat_capacity"], standard])
+
+def _solve(puzzle, name, parameters):
+    module_name, function_name, extra, _ = CONFIGURATIONS[puzzle][name]
+    solve = getattr(importlib.import_module(module_name), function_name)
+    return solve(**dict(parameters, **extra))
+
+def _run(puzzle, name, parameters, connection):
+    try:
+        connection.send((name, _solve(puzzle, name, parameters), None))
+    except Exception as error:
+        connection.send((name, None, repr(error)))
+    finally:
+        connection.close()
+
+def candidates(puzzle, guarantee):
+    """
+    Configuration names that can answer with the given guarantee.
+    """
+    if guarantee not in GUARANTEES:
+        raise ValueError("unknown guarantee: %s" % guarantee)
+    return [name for name, (_, _, _, optimal) in CONFIGURATIONS[puzzle].items()
+            if optimal or guarantee == "any"]
+
+def _context():
+    """
+    Multiprocessing context for the solver processes. Forking a threaded web
+    server is unsafe, so processes are started by a forkserver (or spawned
+    where there is none). The forkserver preloads the solver modules.
+    """
+    global _mp_context
+    with _context_lock:
+        if _mp_context is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(sorted({module for configurations in CONFIGURATIONS.values()
+                                                       for module, _, _, _ in configurations.values()}))
+            else:
+                context = multiprocessing.get_context("spawn")
+            _mp_context = context
+        return _mp_context
+
+def race(puzzle, parameters, guarantee="any", log_path=None, timeout=DEFAULT_TIMEOUT, explore_rate=EXPLORE_RATE,
+         rng=random):
+    """
+    Solve with the portfolio. parameters are keyword arguments for the solve
+    functions of puzzle ("jealous-husband" or "missionary-cannibal").
+
+    At most MAX_CONCURRENT_RACES races run at once; further calls wait for a
+    slot. timeout bounds the whole call, including that wait.
+
+    Returns the winning solver's dictionary with an extra "portfolio" entry:
+    {"winner", "raced", "guarantee", "seconds"}. Only a result with a plan
+    wins. Without a winner, "output" is None, "winner" is None and "reason"
+    is "timeout", "busy" (no slot freed up in time) or "no_plan_found".
+    """
+    names = candidates(puzzle, guarantee)
+    cls = instance_class(puzzle, parameters)
+    started = time.perf_counter()
+    deadline = None if timeout is None else started + timeout
+
+    recommended = recommend(log_path, cls, guarantee) if log_path else None
+    explored = recommended not in names or rng.random() < explore_rate
+    if not explored:
+        names = [recommended]
+
+    winner, result, reason = None, None, "no_plan_found"
+    if not _race_slots.acquire(timeout=timeout):
+        reason = "busy"
+    else:
+        try:
+            winner, result, timed_out = _run_race(puzzle, names, parameters, deadline)
+            if timed_out:
+                reason = "timeout"
+        finally:
+            _race_slots.release()
+
+    seconds = time.perf_counter() - started
+    if result is None:
+        result = {"output": None, "number_of_states": 0, "N": parameters.get("N", parameters.get("M_total")),
+                  "reason": reason}
+    result["portfolio"] = {"winner": winner, "raced": names, "guarantee": guarantee, "seconds": round(seconds, 6)}
+    if log_path and winner is not None and explored:
+        log_race(log_path, cls, guarantee, winner, names, seconds)
+    return result
+
+def _run_race(puzzle, names, parameters, deadline):
+    """
+    Start one process per configuration and wait for the first plan.
+    Returns (winner, result, timed_out). All processes are gone on return.
+    """
+    context = _context()
+    workers = {}
+    winner, result, timed_out = None, None, False
+    try:
+        for name in names:
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_run, args=(puzzle, name, parameters, sender), daemon=True)
+            process.start()
+            sender.close()
+            workers[receiver] = process
+
+        pending = list(workers)
+        while pending and winner is None:
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            ready = wait(pending, remaining)
+            if not ready:
+                timed_out = True
+                break
+            for receiver in ready:
+                pending.remove(receiver)
+                try:
+                    name, solved, error = receiver.recv()
+                except EOFError:
+                    # The process died without answering
+                    continue
+                if error is None and solved["output"] is not None:
+                    winner, result = name, solved
+                    break
+    finally:
+        for receiver, process in workers.items():
+            if process.is_alive():
+                process.terminate()
+            process.join()
+            receiver.close()
+    return winner, result, timed_out
+
+def log_race(log_path, cls, guarantee, winner, raced, seconds):
+    line = json.dumps({"class": cls, "guarantee": guarantee, "winner": winner, "raced": raced,
+                       "seconds": round(seconds, 6)}, sort_keys=True)
+    with _log_lock:
+        with open(log_path, "a") as f:
+            f.write(line + "\n")
+
+def _win_counts(log_path):
+    """
+    Counter of ((class, guarantee), winner) over the log, re-read when the file grew.
+    """
+    try:
+        size = os.path.getsize(log_path)
+    except OSError:
+        return Counter()
+    with _log_lock:
+        cached = _log_cache.get(log_path)
+        if cached is not None and cached[0] == size:
+            return cached[1]
+        counts = Counter()
+        with open(log_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    counts[((entry["class"], entry["guarantee"]), entry["winner"])] += 1
+                except (ValueError, KeyError):
+                    continue
+        _log_cache[log_path] = (size, counts)
+        return counts
+
+def recommend(log_path, cls, guarantee):
+    """
+    The configuration that won at least MIN_WIN_SHARE of at least MIN_RACES
+    logged races for this instance class and guarantee, or None.
+    """
+    wins = {winner: n for (key, winner), n in _win_counts(log_path).items() if key == (cls, guarantee)}
+    total = sum(wins.values())
+    if total < MIN_RACES:
+        return None
+    best = max(sorted(wins), key=wins.get)
+    return best if wins[best] >= MIN_WIN_SHARE * total else None
+
+def win_statistics(log_path):
+    """
+    Wins per configuration for every logged instance class and guarantee.
+    """
+    table = {}
+    for ((cls, guarantee), winner), n in sorted(_win_counts(log_path).items()):
+        table.setdefault(cls, {}).setdefault(guarantee, {})[winner] = n
+    return table
@@ -0,0 +1,438 @@
+"""
+Compiled state graphs.
+
+For a given puzzle, size and boat capacity the reachable state graph never
+changes, so it can be enumerated once and stored in CSR form:
+
+    codes      sorted state codes, one per node (int64)
+    offsets    neighbors of node i are neighbors[offsets[i]:offsets[i + 1]] (int64)
+    neighbors  node indices (int32)
+
+BFS, DFS and A* then run over integer node indices instead of building sets.
+
+    python state_graph.py jealous-husband 6 4 --out graphs/
+"""
+import argparse
+from collections import deque
+import math
+import os
+
+import numpy as np
+
+from bucket_queue import BucketQueue
+from jealous_husbands_packed import decode_state, encode_state, generate_packed_moves
+import missionary_cannibal_solver_bfs
+
+# Graphs with at most this many nodes get an exact diameter (a BFS from every node)
+EXACT_DIAMETER_LIMIT = 5000
+
+
+def encode_missionary_cannibal(state, M_total, C_total):
+    M_left, C_left, M_right, C_right, boat_pos = state
+    return (M_left * (C_total + 1) + C_left) * 2 + (1 if boat_pos == 'right' else 0)
+
+def decode_missionary_cannibal(code, M_total, C_total):
+    boat_pos = 'right' if code & 1 else 'left'
+    M_left, C_left = divmod(code >> 1, C_total + 1)
+    return (M_left, C_left, M_total - M_left, C_total - C_left, boat_pos)
+
+class StateGraph:
+    """
+    CSR state graph of one (puzzle, size, boat_capacity) instance family.
+    size is N for the jealous husbands and (M_total, C_total) otherwise.
+    """
+
+    def __init__(self, puzzle, size, boat_capacity, codes, offsets, neighbors):
+        self.puzzle = puzzle
+        self.size = size
+        self.boat_capacity = boat_capacity
+        self.codes = codes
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self._adjacency = None
+        self._heuristic = None
+        self._on_right = None
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def adjacency(self):
+        """
+        Python lists of the CSR arrays, built once: indexing numpy arrays one
+        element at a time is slower than the search itself.
+        """
+        if self._adjacency is None:
+            self._adjacency = (self.offsets.tolist(), self.neighbors.tolist())
+        return self._adjacency
+
+    def encode(self, state):
+        if self.puzzle == "jealous-husband":
+            return encode_state(state, self.size)
+        return encode_missionary_cannibal(state, *self.size)
+
+    def decode(self, code):
+        if self.puzzle == "jealous-husband":
+            return decode_state(int(code), self.size)
+        return decode_missionary_cannibal(int(code), *self.size)
+
+    def index_of(self, state):
+        """
+        Node index of a state, or None if it is not in the graph.
+        """
+        code = self.encode(state)
+        i = int(np.searchsorted(self.codes, code))
+        if i < len(self.codes) and self.codes[i] == code:
+            return i
+        return None
+
+    def goal_index(self):
+        if self.puzzle == "jealous-husband":
+            N = self.size
+            everyone = frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)])
+            return self.index_of((frozenset(), everyone, 'R'))
+        M_total, C_total = self.size
+        return self.index_of((0, 0, M_total, C_total, 'right'))
+
+    def heuristic(self):
+        """
+        The solvers' A* heuristic, ceil(people on the left bank / 2), for every node.
+        """
+        if self._heuristic is not None:
+            return self._heuristic
+        if self.puzzle == "jealous-husband":
+            N = self.size
+            everyone = (1 << (2 * N)) - 1
+            people_on_left = [2 * N - bin(int(code) & everyone).count("1") for code in self.codes]
+        else:
+            C_total = self.size[1]
+            people_on_left = [sum(divmod(int(code) >> 1, C_total + 1)) for code in self.codes]
+        self._heuristic = [math.ceil(p / 2.0) for p in people_on_left]
+        return self._heuristic
+
+    def bfs(self, start, goal):
+        """
+        BFS over node indices. Returns (path of indices or None, states traversed).
+        """
+        offsets, neighbors = self.adjacency
+        parent = [-1] * len(self.codes)
+        parent[start] = start
+        queue = deque([start])
+        states_traversed = 0
+        while queue:
+            node = queue.popleft()
+            states_traversed += 1
+            if node == goal:
+                return self._path(parent, start, goal), states_traversed
+            for nxt in neighbors[offsets[node]:offsets[node + 1]]:
+                if parent[nxt] < 0:
+                    parent[nxt] = node
+                    queue.append(nxt)
+        return None, states_traversed
+
+    def dfs(self, start, goal):
+        """
+        DFS over node indices that visits states in the same order as the
+        puzzle's regular DFS solver, so it returns the same plan.
+        """
+        if self.puzzle == "jealous-husband":
+            return self._ordered_dfs(start, goal)
+        return self._stack_dfs(start, goal)
+
+    def _stack_dfs(self, start, goal):
+        """
+        Iterative DFS over node indices, mirroring missionary_cannibal_solver_dfs.dfs.
+        """
+        offsets, neighbors = self.adjacency
+        parent = [-1] * len(self.codes)
+        parent[start] = start
+        stack = [start]
+        states_traversed = 0
+        while stack:
+            node = stack.pop()
+            states_traversed += 1
+            if node == goal:
+                return self._path(parent, start, goal), states_traversed
+            for nxt in neighbors[offsets[node]:offsets[node + 1]]:
+                if parent[nxt] < 0:
+                    parent[nxt] = node
+                    stack.append(nxt)
+        return None, states_traversed
+
+    def _ordered_dfs(self, start, goal):
+        """
+        jealous_husbands_dfs.dfs_recursive without recursion: a state is marked
+        visited when it is entered, and its moves are tried in order of the
+        number of people on the right bank.
+        """
+        offsets, neighbors = self.adjacency
+        if self._on_right is None:
+            everyone = (1 << (2 * self.size)) - 1
+            self._on_right = [bin(int(code) & everyone).count("1") for code in self.codes]
+        on_right = self._on_right
+        ordered = lambda node: iter(sorted(neighbors[offsets[node]:offsets[node + 1]], key=on_right.__getitem__))
+        parent = [-1] * len(self.codes)
+        parent[start] = start
+        visited = bytearray(len(self.codes))
+        states_traversed = 1
+        if start == goal:
+            return [start], states_traversed
+        visited[start] = 1
+        stack = [(start, ordered(start))]
+        while stack:
+            node, moves = stack[-1]
+            for nxt in moves:
+                if not visited[nxt]:
+                    break
+            else:
+                stack.pop()
+                continue
+            parent[nxt] = node
+            states_traversed += 1
+            if nxt == goal:
+                return self._path(parent, start, goal), states_traversed
+            visited[nxt] = 1
+            stack.append((nxt, ordered(nxt)))
+        return None, states_traversed
+
+    def astar(self, start, goal):
+        """
+        A* over node indices with the solvers' heuristic and a bucket open list.
+        """
+        offsets, neighbors = self.adjacency
+        h = self.heuristic()
+        g_cost = [-1] * len(self.codes)
+        parent = [-1] * len(self.codes)
+        closed = bytearray(len(self.codes))
+        g_cost[start] = 0
+        parent[start] = start
+        open_set = BucketQueue()
+        open_set.push(start, h[start], 0)
+        states_traversed = 0
+        while open_set:
+            f, g, node = open_set.pop()
+            states_traversed += 1
+            closed[node] = 1
+            if node == goal:
+                return self._path(parent, start, goal), states_traversed
+            for nxt in neighbors[offsets[node]:offsets[node + 1]]:
+                if closed[nxt]:
+                    continue
+                if g_cost[nxt] < 0 or g + 1 < g_cost[nxt]:
+                    g_cost[nxt] = g + 1
+                    parent[nxt] = node
+                    open_set.push(nxt, g + 1 + h[nxt], g + 1)
+        return None, states_traversed
+
+    def _path(self, parent, start, goal):
+        path = [goal]
+        while path[-1] != start:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return path
+
+    def _eccentricity(self, source):
+        offsets, neighbors = self.adjacency
+        dist = [-1] * len(self.codes)
+        dist[source] = 0
+        queue = deque([source])
+        node = source
+        while queue:
+            node = queue.popleft()
+            for nxt in neighbors[offsets[node]:offsets[node + 1]]:
+                if dist[nxt] < 0:
+                    dist[nxt] = dist[node] + 1
+                    queue.append(nxt)
+        return dist[node], node
+
+    def statistics(self):
+        """
+        Node and edge counts and the diameter of the component containing the
+        start and goal (exact for small graphs, otherwise a double-sweep lower bound).
+        """
+        if len(self.codes) == 0:
+            return {"nodes": 0, "edges": 0, "diameter": 0, "diameter_exact": True}
+        if len(self.codes) <= EXACT_DIAMETER_LIMIT:
+            diameter = max(self._eccentricity(i)[0] for i in range(len(self.codes)))
+            exact = True
+        else:
+            start = self.goal_index()
+            _, far = self._eccentricity(start if start is not None else 0)
+            diameter, _ = self._eccentricity(far)
+            exact = False
+        return {
+            "nodes": int(len(self.codes)),
+            "edges": int(len(self.neighbors)) // 2,
+            "diameter": int(diameter),
+            "diameter_exact": exact
+        }
+
+def _build(puzzle, size, boat_capacity, roots, successors):
+    """
+    Enumerate every state reachable from roots and pack the graph as CSR arrays.
+    Every move can be undone, so the graph is undirected.
+    """
+    seen = set(roots)
+    queue = deque(roots)
+    edges = {}
+    while queue:
+        code = queue.popleft()
+        out = list(successors(code))
+        edges[code] = out
+        for nxt in out:
+            if nxt not in seen:
+                seen.add(nxt)
+                queue.append(nxt)
+
+    codes = np.array(sorted(seen), dtype=np.int64)
+    index = {int(code): i for i, code in enumerate(codes)}
+    offsets = np.zeros(len(codes) + 1, dtype=np.int64)
+    neighbors = []
+    for i, code in enumerate(codes):
+        out = edges[int(code)]
+        neighbors.extend(index[nxt] for nxt in out)
+        offsets[i + 1] = offsets[i] + len(out)
+    return StateGraph(puzzle, size, boat_capacity, codes, offsets, np.array(neighbors, dtype=np.int32))
+
+def build_jealous_husbands_graph(N, boat_capacity):
+    """
+    Graph of every state reachable from the standard start or from the goal.
+    """
+    everyone = frozenset([('H', i) for i in range(1, N+1)] + [('W', i) for i in range(1, N+1)])
+    roots = [encode_state((everyone, frozenset(), 'L'), N), encode_state((frozenset(), everyone, 'R'), N)]
+    return _build("jealous-husband", N, boat_capacity, roots,
+                  lambda code: generate_packed_moves(code, N, boat_capacity))
+
+def build_missionary_cannibal_graph(M_total, C_total, boat_capacity):
+    """
+    Graph of every state reachable from the standard start or from the goal.
+    """
+    roots = [encode_missionary_cannibal((M_total, C_total, 0, 0, 'left'), M_total, C_total),
+             encode_missionary_cannibal((0, 0, M_total, C_total, 'right'), M_total, C_total)]
+
+    def successors(code):
+        state = decode_missionary_cannibal(code, M_total, C_total)
+        for nxt in missionary_cannibal_solver_bfs.get_next_states(state, M_total, C_total, boat_capacity):
+            yield encode_missionary_cannibal(nxt, M_total, C_total)
+
+    return _build("missionary-cannibal", (M_total, C_total), boat_capacity, roots, successors)
+
+def graph_filename(puzzle, size, boat_capacity):
+    if puzzle == "jealous-husband":
+        return "jealous-husband_%d_%d.npz" % (size, boat_capacity)
+    return "missionary-cannibal_%d_%d_%d.npz" % (size[0], size[1], boat_capacity)
+
+def save_state_graph(graph, directory):
+    """
+    Store the graph as an .npz file in directory; returns its path.
+    """
+    path = os.path.join(directory, graph_filename(graph.puzzle, graph.size, graph.boat_capacity))
+    size = np.array(graph.size if isinstance(graph.size, tuple) else (graph.size,), dtype=np.int64)
+    np.savez(path, puzzle=np.array(graph.puzzle), size=size, boat_capacity=np.array(graph.boat_capacity),
+             codes=graph.codes, offsets=graph.offsets, neighbors=graph.neighbors)
+    return path
+
+def load_state_graph(path):
+    with np.load(path) as data:
+        puzzle = str(data["puzzle"])
+        size = tuple(int(x) for x in data["size"])
+        size = size[0] if puzzle == "jealous-husband" else size
+        return StateGraph(puzzle, size, int(data["boat_capacity"]),
+                          data["codes"], data["offsets"], data["neighbors"])
+
+_loaded = {}
+
+def find_state_graph(directory, puzzle, size, boat_capacity):
+    """
+    Compiled graph for an instance family from directory, loaded once per
+    process, or None if it was not built.
+    """
+    if not directory:
+        return None
+    path = os.path.join(directory, graph_filename(puzzle, size, boat_capacity))
+    if path not in _loaded:
+        _loaded[path] = load_state_graph(path) if os.path.exists(path) else None
+    return _loaded[path]
+
+def solve(graph, start_state, solver="bfs"):
+    """
+    Run "bfs", "dfs" or "a_star" on the compiled graph.
+    Returns (path of states or None, number_of_states), or None if start_state
+    is not part of the graph and the regular solvers must be used.
+    """
+    start = graph.index_of(start_state)
+    if start is None:
+        return None
+    goal = graph.goal_index()
+    if goal is None:
+        return None, 1
+    search = {"bfs": graph.bfs, "dfs": graph.dfs, "a_star": graph.astar}[solver]
+    path, states_traversed = search(start, goal)
+    if path is None:
+        return None, states_traversed
+    return [graph.decode(graph.codes[i]) for i in path], states_traversed
+
+def jealous_husbands_state(left, right, boat_pos):
+    return (frozenset(tuple(p) for p in left), frozenset(tuple(p) for p in right), boat_pos)
+
+def solve_jealous_husbands(graph, left, right, boat_pos='L', solver="bfs"):
+    """
+    Solve a Jealous Husbands instance on its compiled graph. Returns the same
+    dictionary as the regular solvers, or None if the start state is not in the graph.
+    """
+    solved = solve(graph, jealous_husbands_state(left, right, boat_pos), solver)
+    if solved is None:
+        return None
+    path, states_traversed = solved
+    if path is None:
+        return {"output": None, "number_of_states": states_traversed, "N": graph.size}
+    output = {}
+    for i, (l, r, bp) in enumerate(path):
+        output[str(i)] = {
+            'left_bank': sorted(list(l)),
+            'right_bank': sorted(list(r)),
+            'boat_position': bp
+        }
+    return {"output": output, "number_of_states": states_traversed, "N": graph.size}
+
+def solve_missionaries_cannibals(graph, M_left, C_left, M_right, C_right, boat_position='left', solver="bfs"):
+    """
+    Solve a Missionaries and Cannibals instance on its compiled graph. Returns the
+    same dictionary as the regular solvers, or None if the start state is not in the graph.
+    """
+    solved = solve(graph, (M_left, C_left, M_right, C_right, boat_position), solver)
+    if solved is None:
+        return None
+    path, states_traversed = solved
+    M_total = graph.size[0]
+    if path is None:
+        return {"output": None, "number_of_states": states_traversed, "N": M_total}
+    output = {}
+    for i, (Ml, Cl, Mr, Cr, bp) in enumerate(path):
+        output[str(i)] = {
+            'M_left': Ml,
+            'C_left': Cl,
+            'M_right': Mr,
+            'C_right': Cr,
+            'boat_position': bp
+        }
+    return {"output": output, "number_of_states": states_traversed, "N": M_total}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the reachable state graph of an instance family.")
+    parser.add_argument("puzzle", choices=["jealous-husband", "missionary-cannibal"])
+    parser.add_argument("size", type=int, help="number of couples, or of missionaries (= cannibals)")
+    parser.add_argument("boat_capacity", type=int)
+    parser.add_argument("--cannibals", type=int, help="number of cannibals if different from missionaries")
+    parser.add_argument("--out", default=".", help="directory to write the .npz file to")
+    args = parser.parse_args()
+
+    if args.puzzle == "jealous-husband":
+        graph = build_jealous_husbands_graph(args.size, args.boat_capacity)
+    else:
+        cannibals = args.cannibals if args.cannibals is not None else args.size
+        graph = build_missionary_cannibal_graph(args.size, cannibals, args.boat_capacity)
+    os.makedirs(args.out, exist_ok=True)
+    print("Saved", save_state_graph(graph, args.out))
+    print(graph.statistics())